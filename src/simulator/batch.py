@@ -0,0 +1,183 @@
+import argparse
+import contextlib
+import copy
+import io
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from simulator.simulator import Simulator
+
+
+# Batch of headless simulations run in parallel processes.
+#
+# A scenario is a dict:
+#   name: label of the scenario (e.g. the map file name)
+#   config: parsed map file (see Simulator.from_config)
+#   seed: seed of the simulator's random number generator
+#   max_time: simulated time [s] after which the run is stopped
+#   params: (optional) parameters of the scenario, copied to the result table
+#
+# The run is caught or escaped if it was stopped by the collision of the escaper with the pursuer
+# or with its destination point (CollisionController with the "stop_simulation" action).
+#
+# Example (from the repository root):
+#   PYTHONPATH=.:src python -m simulator.batch assets/labyrinth.json --seeds 8 \
+#       --set PursuingController.probabilistic=true,false --max-time 60 -o results.csv
+
+
+def _parse_value(value: str):
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def apply_params(config: dict, params: dict) -> dict:
+    # params: {"<controller type>.<key>": value} or {"<point name>.<key>": value}
+    config = copy.deepcopy(config)
+    for name, value in params.items():
+        target, key = name.rsplit(".", 1)
+        matched = [c for c in config["controllers"] if c["type"] == target] + \
+                  [p for p in config["objects"]["points"] if p.get("name") == target]
+        if not matched:
+            raise ValueError(f"No controller or point '{target}' in the scenario")
+        for item in matched:
+            item[key] = value
+    return config
+
+
+def make_scenarios(paths: [str], seeds: [int], sweep: dict = None, max_time: float = 60) -> [dict]:
+    # one scenario per map, seed and combination of the swept parameter values
+    # sweep: {"<controller type or point name>.<key>": [values]}
+    sweep = sweep if sweep is not None else {}
+    scenarios = []
+    for path in paths:
+        with open(path, "r") as f:
+            config = json.load(f)
+        for values in itertools.product(*sweep.values()):
+            params = dict(zip(sweep.keys(), values))
+            for seed in seeds:
+                scenarios.append({
+                    "name": os.path.basename(path),
+                    "config": apply_params(config, params),
+                    "seed": seed,
+                    "max_time": max_time,
+                    "params": params,
+                })
+    return scenarios
+
+
+def _path_length(df_point: pd.DataFrame) -> float:
+    return float(np.hypot(np.diff(df_point["x"].to_numpy()), np.diff(df_point["y"].to_numpy())).sum())
+
+
+def classify_outcome(stop_reason, escaping: dict) -> tuple[bool, bool]:
+    # (caught, escaped) from the collision which stopped the run, escaping: config of the escaping controller
+    if not isinstance(stop_reason, tuple) or stop_reason[0] != "collision":
+        return False, False
+    points = set(stop_reason[1:])
+    caught = points == {escaping["managed_point"], escaping["pursuing_point"]}
+    escaped = points == {escaping["managed_point"], escaping["destination_point"]}
+    return caught, escaped
+
+
+def run_scenario(scenario: dict, keep_history: bool = False, quiet: bool = True) -> tuple[dict, pd.DataFrame | None]:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        sim = Simulator.from_config(scenario["config"], headless=True, seed=scenario["seed"])
+        df_history = sim.run(max_time=scenario["max_time"])
+    wall_time = time.perf_counter() - start
+
+    end_time = float(df_history.index.max()) if len(df_history) else 0.0
+    outcome = {
+        "name": scenario["name"],
+        "seed": scenario["seed"],
+        **scenario.get("params", {}),
+        "end_time": end_time,
+        "wall_time": wall_time,
+    }
+
+    # roles of the points come from the escaping controller
+    escaping = [c for c in scenario["config"]["controllers"] if c["type"] == "EscapingController"]
+    if escaping:
+        caught, escaped = classify_outcome(sim.get_stop_reason(), escaping[0])
+        outcome["caught"] = caught
+        outcome["capture_time"] = end_time if caught else np.nan
+        outcome["escaped"] = escaped
+        outcome["escape_time"] = end_time if escaped else np.nan
+
+    id_to_name = sim.get_id_to_name()
+    for point_id, df_point in df_history.groupby("id"):
+        outcome[f"path_{id_to_name.get(point_id, point_id)}"] = _path_length(df_point)
+
+    return outcome, df_history if keep_history else None
+
+
+def _run_indexed(args) -> tuple[int, dict, pd.DataFrame | None]:
+    i, scenario, keep_history = args
+    outcome, df_history = run_scenario(scenario, keep_history)
+    return i, outcome, df_history
+
+
+def run_batch(
+        scenarios: [dict],
+        max_workers: int = None,
+        keep_history: bool = False
+) -> tuple[pd.DataFrame, pd.DataFrame | None]:
+    # runs the scenarios in separate processes, returns table of outcomes (one row per run)
+    # and optionally histories of all runs (with the run column)
+    outcomes = [None] * len(scenarios)
+    histories = [None] * len(scenarios)
+    tasks = [(i, scenario, keep_history) for i, scenario in enumerate(scenarios)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for i, outcome, df_history in executor.map(_run_indexed, tasks):
+            outcomes[i] = {"run": i, **outcome}
+            if df_history is not None:
+                histories[i] = df_history.assign(run=i)
+
+    df_outcomes = pd.DataFrame(outcomes)
+    df_histories = pd.concat(histories) if keep_history and scenarios else None
+    return df_outcomes, df_histories
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many headless simulations in parallel")
+    parser.add_argument("maps", nargs="+", help="map files (.json)")
+    parser.add_argument("--seeds", type=int, default=1, help="number of seeds per scenario")
+    parser.add_argument("--seed-offset", type=int, default=0, help="first seed")
+    parser.add_argument("--set", action="append", default=[], metavar="TARGET.KEY=V1,V2",
+                        help="swept parameter of a controller type or point name")
+    parser.add_argument("--max-time", type=float, default=60, help="simulated time of a run [s]")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes")
+    parser.add_argument("-o", "--output", default=None, help="csv file for the outcomes")
+    parser.add_argument("--histories", default=None, help="csv file for the histories of all runs")
+    args = parser.parse_args()
+
+    sweep = {}
+    for item in args.set:
+        if "=" not in item:
+            raise ValueError(f"Invalid parameter '{item}', expected TARGET.KEY=V1,V2")
+        name, values = item.split("=", 1)
+        sweep[name] = [_parse_value(v) for v in values.split(",")]
+
+    seeds = list(range(args.seed_offset, args.seed_offset + args.seeds))
+    scenarios = make_scenarios(args.maps, seeds, sweep, args.max_time)
+    print(f"Running {len(scenarios)} scenarios...")
+    df_outcomes, df_histories = run_batch(scenarios, args.workers, keep_history=args.histories is not None)
+
+    if args.output:
+        df_outcomes.to_csv(args.output, index=False)
+    else:
+        print(df_outcomes.to_string(index=False))
+    if df_histories is not None:
+        df_histories.to_csv(args.histories, index_label="t")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+import argparse
+import contextlib
+import copy
+import importlib
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+from simulator.simulator import Simulator
+
+
+# Benchmark of the per-frame cost of the controllers and the physics step in headless runs.
+#
+# Every map is run in several variants, in which the pursuer is driven by a different controller type
+# (the escaper keeps the controllers of the map). Results are written as JSON, so runs of different
+# commits can be compared with --compare.
+#
+# A microbenchmark counts the vectors built in a frame of a single point (add force, update position,
+# history row, subtract force), every Vect2d operation which is not in place builds a new one.
+#
+# Example (from the repository root):
+#   PYTHONPATH=.:src python -m simulator.benchmark -o bench.json
+#   PYTHONPATH=.:src python -m simulator.benchmark --compare bench.json
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "assets")
+DEFAULT_MAPS = ["map_test.json", "labyrinth.json"]
+DEFAULT_SIZES = [25, 50, 100]
+
+# controller of the pursuer in a variant, None keeps the controllers of the map
+VARIANTS = {
+    "map": None,
+    "astar": {"type": "AstarController"},
+    "vision": {"type": "VisionController"},
+    "forecasting": {"type": "ForecastingController"},
+    "probabilistic": {"type": "PursuingController", "probabilistic": True},
+    "particle": {"type": "PursuingController", "particle_filter": True},
+}
+
+
+def synthetic_config(size: int, seed: int = 0) -> dict:
+    # square map [m] with walls every 5 m (each with two gaps) and random pillars between them,
+    # the escaper starts in the top left corner, the pursuer in the bottom left one, the exit is on the right
+    rng = np.random.default_rng(seed)
+    points = [
+        {"name": "p0_dest", "x": size - 2, "y": size // 2, "color": "pink", "radius": 0.5},
+        {"name": "p0", "x": 2, "y": 2, "color": "red"},
+        {"name": "p1", "x": 2, "y": size - 2, "color": "blue"},
+    ]
+
+    blocks = []
+    for x in range(5, size - 3, 5):
+        free = np.ones(size, dtype=bool)
+        for gap in rng.choice(size - 2, 2, replace=False):
+            free[gap:gap + 2] = False
+        y = 0
+        while y < size:
+            if not free[y]:
+                y += 1
+                continue
+            h = int(np.argmin(free[y:])) if not free[y:].all() else size - y
+            blocks.append({"x": x, "y": y, "h": h})
+            y += h
+
+    near_points = {(p["x"] + dx, p["y"] + dy) for p in points for dx in (-1, 0, 1) for dy in (-1, 0, 1)}
+    for _ in range(size * size // 40):
+        x = int(rng.integers(0, size // 5)) * 5 + int(rng.integers(2, 4))
+        y = int(rng.integers(1, size - 1))
+        if x < size - 1 and (x, y) not in near_points:
+            blocks.append({"x": x, "y": y})
+
+    return {
+        "window": {"w_px": 1920, "h_px": 1080},
+        "canvas": {"w": size, "h": size},
+        "objects": {"blocks": blocks, "points": points},
+        "controllers": [
+            {"type": "EscapingController", "managed_point": "p0", "destination_point": "p0_dest",
+             "pursuing_point": "p1"},
+            {"type": "PursuingController", "managed_point": "p1", "destination_point": "p0"},
+        ],
+    }
+
+
+def variant_config(config: dict, variant: str) -> dict:
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown variant '{variant}', available: {list(VARIANTS)}")
+    config = copy.deepcopy(config)
+    if VARIANTS[variant] is None:
+        return config
+    pursuing = [c for c in config["controllers"] if c["type"] == "PursuingController"]
+    if not pursuing:
+        raise ValueError(f"Variant '{variant}' requires a map with PursuingController")
+    i = config["controllers"].index(pursuing[0])
+    config["controllers"][i] = {
+        "managed_point": pursuing[0]["managed_point"],
+        "destination_point": pursuing[0]["destination_point"],
+        **VARIANTS[variant],
+    }
+    return config
+
+
+def _timed(fn, samples: list):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        samples.append(time.perf_counter() - start)
+        return result
+
+    return wrapper
+
+
+def _stats(samples: list, frames: int) -> dict:
+    # per_frame: mean cost per simulated frame, the rest is per call [ms]
+    s = np.array(samples) * 1e3
+    if s.size == 0:
+        return {"calls": 0, "per_frame": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    return {
+        "calls": int(s.size),
+        "per_frame": float(s.sum() / max(frames, 1)),
+        "p50": float(np.percentile(s, 50)),
+        "p95": float(np.percentile(s, 95)),
+        "max": float(s.max()),
+    }
+
+
+def run_case(name: str, config: dict, variant: str, frames: int, seed: int = 0) -> dict:
+    config = variant_config(config, variant)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        sim = Simulator.from_config(config, headless=True, seed=seed)
+        setup_time = time.perf_counter() - start
+
+        samples = {"physics": []}
+        system = sim.get_point_mass_system()
+        system.update_positions = _timed(system.update_positions, samples["physics"])
+        for c in sim.get_controllers():
+            key = c.get_type()
+            i = 1
+            while key in samples:
+                i += 1
+                key = f"{c.get_type()}#{i}"
+            samples[key] = []
+            c.apply = _timed(c.apply, samples[key])
+
+        start = time.perf_counter()
+        sim.run(max_steps=frames)
+        wall_time = time.perf_counter() - start
+
+    done = len(samples["physics"])
+    return {
+        "map": name,
+        "variant": variant,
+        "canvas": [config["canvas"]["w"], config["canvas"]["h"]],
+        "blocks": len(config["objects"]["blocks"]),
+        "frames": done,
+        "setup_s": setup_time,
+        "wall_s": wall_time,
+        "fps": done / wall_time if wall_time > 0 else float("inf"),
+        "ms": {key: _stats(s, done) for key, s in samples.items()},
+    }
+
+
+def _vector_classes() -> list:
+    # the module is imported as simulator.utils.vect_2d and src.simulator.utils.vect_2d,
+    # which gives two copies of every class
+    classes = []
+    for name in ("simulator.utils.vect_2d", "src.simulator.utils.vect_2d"):
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            continue
+        for cls in (module.Vect2d, module.Vect2dArray):
+            if cls not in classes:
+                classes.append(cls)
+    return classes
+
+
+def run_allocations(frames: int = 600) -> dict:
+    from src.simulator.objects.point_mass import PointMass
+    from src.simulator.utils.vect_2d import Vect2d
+
+    pt = PointMass(0, 5, 5)
+    force = Vect2d(1, 0.5)
+    dt = 1 / 60
+
+    def frame():
+        pt.add_force(force)
+        pt.update_position(dt, [])
+        pt.__dict__()
+        pt.subtract_force(force)
+
+    frame()  # warm-up
+
+    # constructors of the vector classes wrapped with counters (Vect2dArray results of operations are
+    # built by _wrap without __init__)
+    counts = {}
+    patched = []
+    for cls in _vector_classes():
+        for attr in ("__init__", "_wrap"):
+            if attr in vars(cls):
+                patched.append((cls, attr, vars(cls)[attr]))
+
+    def counting(name, fn):
+        def wrapper(*args, **kwargs):
+            counts[name] = counts.get(name, 0) + 1
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    try:
+        for cls, attr, original in patched:
+            if isinstance(original, staticmethod):
+                setattr(cls, attr, staticmethod(counting(cls.__name__, original.__func__)))
+            else:
+                setattr(cls, attr, counting(cls.__name__, original))
+        for _ in range(frames):
+            frame()
+    finally:
+        for cls, attr, original in patched:
+            setattr(cls, attr, original)
+
+    # best of a few repeats, a frame takes only microseconds
+    wall_time = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(frames):
+            frame()
+        wall_time = min(wall_time, time.perf_counter() - start)
+
+    return {
+        "frames": frames,
+        "us_per_frame": wall_time / frames * 1e6,
+        "per_frame": {name: counts.get(name, 0) / frames for name in ("Vect2d", "Vect2dArray")},
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(
+        maps: [str] = None,
+        sizes: [int] = None,
+        variants: [str] = None,
+        frames: int = 600,
+        seed: int = 0
+) -> dict:
+    maps = [os.path.join(ASSETS_DIR, m) for m in DEFAULT_MAPS] if maps is None else maps
+    sizes = DEFAULT_SIZES if sizes is None else sizes
+    variants = list(VARIANTS) if variants is None else variants
+
+    cases = []
+    for path in maps:
+        with open(path, "r") as f:
+            cases.append((os.path.basename(path), json.load(f)))
+    for size in sizes:
+        cases.append((f"synthetic_{size}", synthetic_config(size, seed)))
+
+    allocations = run_allocations(frames)
+    print(f"{'point mass frame':>31}: {allocations['us_per_frame']:8.1f} us, vectors built per frame: "
+          + ", ".join(f"{name} {n:.1f}" for name, n in allocations["per_frame"].items()))
+
+    results = []
+    for name, config in cases:
+        for variant in variants:
+            result = run_case(name, config, variant, frames, seed)
+            print(f"{name:>16} {variant:>14}: {result['fps']:8.1f} FPS "
+                  f"(physics {result['ms']['physics']['per_frame']:.3f} ms/frame)")
+            results.append(result)
+
+    return {
+        "commit": _git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "frames": frames,
+        "seed": seed,
+        "allocations": allocations,
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict) -> None:
+    # ratio new/old of the FPS and of the per-frame cost of every timed part
+    old_results = {(r["map"], r["variant"]): r for r in old["results"]}
+    print(f"{old['commit']} -> {new['commit']}")
+    if "allocations" in old and "allocations" in new:
+        o, n = old["allocations"], new["allocations"]
+        print(f"{'point mass frame':>31}: {o['us_per_frame']:8.1f} -> {n['us_per_frame']:8.1f} us, "
+              f"vectors built per frame: " + ", ".join(
+                  f"{name} {o['per_frame'].get(name, 0):.1f} -> {count:.1f}" for name, count in n["per_frame"].items()
+              ))
+    for r in new["results"]:
+        o = old_results.get((r["map"], r["variant"]))
+        if o is None:
+            continue
+        parts = [
+            f"{key} x{o['ms'][key]['per_frame'] / s['per_frame']:.2f}"
+            for key, s in r["ms"].items()
+            if key in o["ms"] and s["per_frame"] > 0
+        ]
+        print(f"{r['map']:>16} {r['variant']:>14}: FPS {o['fps']:8.1f} -> {r['fps']:8.1f} "
+              f"(x{r['fps'] / o['fps']:.2f}); speedup: {', '.join(parts)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-frame cost of controllers and physics")
+    parser.add_argument("maps", nargs="*", help="map files (.json), by default the maps from assets")
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES, help="sizes of synthetic maps [m]")
+    parser.add_argument("--variants", nargs="*", default=list(VARIANTS), choices=list(VARIANTS),
+                        help="controllers of the pursuer")
+    parser.add_argument("--frames", type=int, default=600, help="simulated frames per case")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the simulators and synthetic maps")
+    parser.add_argument("-o", "--output", default=None, help="json file for the results")
+    parser.add_argument("--compare", default=None, metavar="JSON", help="results of a previous run to compare with")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.maps or None, args.sizes, args.variants, args.frames, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,8 @@ from src.simulator.utils.vect_2d import Vect2d
 
 class BaseController:
     def __init__(self) -> None:
-        pass
+        # frequency of updates [Hz] used by the simulator, None: every frame
+        self.update_rate: float | None = None
 
     def get_force_between(self, p1: Vect2d, p2: Vect2d, max_value=None) -> Vect2d:
         dx = p2.x - p1.x
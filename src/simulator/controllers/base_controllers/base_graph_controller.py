@@ -5,6 +5,8 @@ import networkx as nx
 from simulator.controllers.base_controllers.base_controller import BaseController
 from src.simulator.utils.vect_2d import Vect2d
 from src.simulator.objects.block import Block
+from src.simulator.utils.navigation_grid import NavigationGrid, get_navigation_grid, navigation_grid_key
+from src.simulator.utils.block_index import BlockIndex
 
 
 class BaseGraphController(BaseController):
@@ -12,47 +14,36 @@ class BaseGraphController(BaseController):
             self,
             canvas_dim: Vect2d,
             blocks: [Block],
-            gap_between_nodes: float = 1 / 2
+            gap_between_nodes: float = 1 / 2,
+            block_index: BlockIndex = None
     ):
         super().__init__()
         self._blocks: [Block] = blocks  # [m]
         self._canvas_dim: Vect2d = canvas_dim  # [m]
         self._gap_between_nodes: float = gap_between_nodes  # [m]
+        # the index of the simulator may be shared (it also holds the map borders), otherwise one over the blocks
+        self._block_index: BlockIndex = block_index if block_index is not None else BlockIndex(blocks)
 
-        self._graph: nx.Graph = self._init_graph()
+        # controllers with the same map and resolution share one grid
+        self._grid: NavigationGrid = get_navigation_grid(
+            navigation_grid_key(self._canvas_dim, self._blocks, self._gap_between_nodes),
+            self._init_grid
+        )
 
         # self.plot_graph()
 
-    def _init_graph(self):
-        graph = nx.grid_2d_graph(
+    @property
+    def _graph(self) -> nx.Graph:
+        return self._grid.graph
+
+    def _grid_shape(self) -> tuple[int, int]:
+        return (
             self._canvas_dim.x * int(1 / self._gap_between_nodes) + 1,
             self._canvas_dim.y * int(1 / self._gap_between_nodes) + 1
         )
 
-        # add diagonal edges
-        for node in graph.nodes:
-            neighs = graph.neighbors(node)
-            for n1 in neighs:
-                for n2 in neighs:
-                    if n1 != n2 and abs(n1[0] - n2[0]) == 1 and abs(n1[1] - n2[1]) == 1:
-                        graph.add_edge(n1, n2, weight=1.5)
-
-        def is_inside(node, block):
-            x, y = node
-            is_in_x = block.x <= x * self._gap_between_nodes <= block.x + block.w
-            is_in_y = block.y <= y * self._gap_between_nodes <= block.y + block.h
-            # is_in_y = self._canvas_dim.y - block.y - block.h <= y * self._step <= self._canvas_dim.y - block.y
-            return is_in_x and is_in_y
-
-        for block in self._blocks:
-            for_deletion = []
-            for node in graph.nodes:
-                if is_inside(node, block):
-                    for_deletion.append(node)
-            for node in for_deletion:
-                graph.remove_node(node)
-
-        return graph
+    def _init_grid(self) -> NavigationGrid:
+        return NavigationGrid.from_blocks(self._grid_shape(), self._blocks, self._gap_between_nodes)
 
     def apply(self, t: float, dt: float) -> None:
         raise NotImplementedError()
@@ -116,11 +107,18 @@ class BaseGraphController(BaseController):
     def cord_to_node(self, cord: tuple[float, float], find_closest_for_nonexistent=False) -> tuple[int, int]:
         calculated_node = int(cord[0] / self._gap_between_nodes), int(cord[1] / self._gap_between_nodes)
 
-        if find_closest_for_nonexistent and calculated_node not in self._graph.nodes:
-            closest_node = min(self._graph.nodes, key=lambda n: Vect2d(*n).distance(Vect2d(*calculated_node)))
-            return closest_node
+        if find_closest_for_nonexistent and not self._grid.is_walkable(calculated_node):
+            return self._grid.closest_walkable(calculated_node)
 
         return calculated_node
 
+    def _find_path(
+            self,
+            start: tuple[int, int],
+            goal: tuple[int, int],
+            max_cost: float = None
+    ) -> [tuple[int, int]]:
+        return self._grid.astar_path(start, goal, max_cost)
+
     def node_to_cord(self, node: tuple[int, int]) -> tuple[float, float]:
         return (node[0] * self._gap_between_nodes, node[1] * self._gap_between_nodes)
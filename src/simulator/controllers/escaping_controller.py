@@ -1,9 +1,12 @@
+import warnings
+
 from simulator.controllers.base_controllers.base_controller import BaseController
 from simulator.controllers.movement_controllers.astar_controller import AstarController
 from simulator.controllers.movement_controllers.forecasting_controller import ForecastingController
 from simulator.controllers.movement_controllers.vision_controller import VisionController
 from simulator.objects.block import Block
 from simulator.objects.point_mass import PointMass
+from simulator.utils.block_index import BlockIndex
 from simulator.utils.vect_2d import Vect2d
 
 import numpy as np
@@ -26,9 +29,17 @@ class EscapingController(BaseController):
             crossroads_score: int = 100,
             known_score: int = 1000,
             edge_threshold: int = 4,
-            priority_queue_size: int = 1000
+            priority_queue_size: int = None,
+            block_index: BlockIndex = None
     ):
         super().__init__()
+        # priority_queue_size: deprecated and ignored, see VisionController
+        if priority_queue_size is not None:
+            warnings.warn(
+                "EscapingController priority_queue_size is deprecated and ignored",
+                DeprecationWarning,
+                stacklevel=2
+            )
         self._managed_point: PointMass = managed_point
         self._target_point: PointMass = target_point
         self._pursuing_point: PointMass = pursuing_point
@@ -46,7 +57,7 @@ class EscapingController(BaseController):
             crossroads_score,
             known_score,
             edge_threshold,
-            priority_queue_size
+            block_index=block_index
         )
 
         self._astar_controller = AstarController(
@@ -55,7 +66,8 @@ class EscapingController(BaseController):
             canvas_dim,
             blocks,
             gap_between_nodes,
-            steps_ahead
+            steps_ahead,
+            block_index=block_index
         )
 
         self.f_runaway: Vect2d = Vect2d(0, 0)
@@ -1,9 +1,9 @@
 
-import networkx as nx
 from matplotlib import pyplot as plt
 
 from simulator.controllers.base_controllers.base_graph_controller import BaseGraphController
 from src.simulator.objects.block import Block
+from src.simulator.utils.block_index import BlockIndex
 from src.simulator.objects.point_mass import PointMass
 from src.simulator.utils.vect_2d import Vect2d
 
@@ -18,25 +18,57 @@ class AstarController(BaseGraphController):
             blocks: [Block],
             gap_between_nodes: float = 1 / 2,
             steps_ahead: int = 1,
+            incremental: bool = False,
+            replan_distance: float = 2,
+            distance_field: bool = False,
+            block_index: BlockIndex = None,
     ):
         super().__init__(
             canvas_dim,
             blocks,
-            gap_between_nodes
+            gap_between_nodes,
+            block_index
         )
 
         self._managed_point: PointMass = managed_point
         self._destination_point: Vect2d | PointMass = destination_point
         self._steps_ahead: int = steps_ahead
 
+        # incremental planning: the previous path is reused while the start stays on it (or next to it)
+        # and the goal drifts less than replan_distance from the goal of the last full search;
+        # the path is only repaired when the goal moves to another node
+        self._incremental: bool = incremental
+        self._replan_distance: float = replan_distance  # [m]
+        self._path: [tuple[int, int]] | None = None
+        self._planned_goal: tuple[int, int] | None = None
+
+        # static destination (opt-in): one reverse Dijkstra now, steepest descent on the field every frame;
+        # the path has the same length as the A* one, but may differ from it between equally long paths
+        self._distance_field_goal: tuple[int, int] | None = None
+        if distance_field and isinstance(destination_point, Vect2d):
+            self._distance_field_goal = self.cord_to_node(
+                tuple(destination_point),
+                find_closest_for_nonexistent=True
+            )
+            self._grid.distance_field(self._distance_field_goal)
+
         self.f = Vect2d(0, 0)
 
+    @property
+    def destination_point(self) -> Vect2d | PointMass:
+        return self._destination_point
+
+    @destination_point.setter
+    def destination_point(self, value: Vect2d | PointMass) -> None:
+        # e.g. the forecast of a pursued point, replaced every frame
+        self._destination_point = value
+
     def apply(self, t, dt) -> None:
         d_f = self.update(t, dt)
         self._managed_point.add_force(d_f)
 
     def update(self, t, dt) -> Vect2d:
-        astar_path = self._get_astar_path()
+        astar_path = self._get_astar_path(self._path_horizon())
 
         if len(astar_path) > 1:
             next_point = Vect2d(0, 0)
@@ -77,10 +109,14 @@ class AstarController(BaseGraphController):
 
         if len(astar_path) == 1:
             f = -1*self.f
-            self.f *= 0
+            self.f = Vect2d(0, 0)
             return f
 
-    def _get_astar_path(self):
+    def _path_horizon(self) -> int:
+        # number of path nodes used by update
+        return int(self._steps_ahead / self._gap_between_nodes) + 2
+
+    def _get_astar_path(self, max_length: int = None):
         dest = None
         if isinstance(self._destination_point, PointMass):
             dest = self._destination_point.center
@@ -89,8 +125,7 @@ class AstarController(BaseGraphController):
         if dest is None:
             raise Exception("Invalid destination point type")
 
-        astar_path = nx.astar_path(
-            self._graph, # @FIXME: consider subgraph form base graph controller
+        astar_path = self._plan_path(
             self.cord_to_node(
                 tuple(self._managed_point.center),
                 find_closest_for_nonexistent=True
@@ -98,10 +133,67 @@ class AstarController(BaseGraphController):
             self.cord_to_node(
                 tuple(dest),
                 find_closest_for_nonexistent=True
-            )
+            ),
+            max_length
         )
         return astar_path
 
+    def _plan_path(
+            self,
+            start: tuple[int, int],
+            goal: tuple[int, int],
+            max_length: int = None
+    ) -> [tuple[int, int]]:
+        # the path may be cut to its first max_length nodes
+        if goal == self._distance_field_goal:
+            return self._grid.descend(self._grid.distance_field(goal), start, max_length)
+
+        if not self._incremental:
+            return self._find_path(start, goal)
+
+        path = self._reuse_path(start, goal)
+        if path is None:
+            path = self._find_path(start, goal)
+            self._planned_goal = goal
+        self._path = path
+        return path
+
+    def _reuse_path(self, start: tuple[int, int], goal: tuple[int, int]) -> [tuple[int, int]]:
+        # the previous path from start on, repaired if the goal moved to another node;
+        # None if a full search is needed
+        path = self._path
+        if path is None:
+            return None
+        if start in path:
+            path = path[path.index(start):]
+        else:
+            # the point left the path (e.g. cut a corner), it rejoins it at the furthest
+            # of the next nodes which is its neighbour
+            near = [
+                i for i, node in enumerate(path[:self._path_horizon()])
+                if max(abs(node[0] - start[0]), abs(node[1] - start[1])) == 1
+            ]
+            if not near:
+                return None
+            path = [start] + path[near[-1]:]
+
+        if goal == path[-1]:
+            return path
+        drift = Vect2d(*goal).distance(Vect2d(*self._planned_goal)) * self._gap_between_nodes
+        if drift > self._replan_distance:
+            return None
+
+        # repair: extend the path from its old goal to the new one, joining at the last extension node
+        # which is already on the path; the search only expands nodes close to both goals, a longer
+        # extension (e.g. a wall between them) is left to the full search
+        max_cost = 3 * self._replan_distance / self._gap_between_nodes
+        extension = self._find_path(path[-1], goal, max_cost)
+        if extension is None:
+            return None
+        on_path = {node: i for i, node in enumerate(path)}
+        j = max(j for j, node in enumerate(extension) if node in on_path)
+        return path[:on_path[extension[j]]] + extension[j:]
+
     def plot_path(self):
         astar_path = self._get_astar_path()
 
@@ -1,5 +1,6 @@
 from simulator.controllers.movement_controllers.astar_controller import AstarController
 from src.simulator.objects.block import Block
+from src.simulator.utils.block_index import BlockIndex
 from src.simulator.objects.point_mass import PointMass
 from src.simulator.utils.vect_2d import Vect2d
 
@@ -11,9 +12,12 @@ class ForecastingController(AstarController):
                  canvas_dim: Vect2d,
                  blocks: [Block],
                  gap_between_nodes: float = 1 / 2,
-                 steps_ahead: int = 1
+                 steps_ahead: int = 1,
+                 incremental: bool = False,
+                 block_index: BlockIndex = None
                  ):
-        super().__init__(managed_point, target, canvas_dim, blocks, gap_between_nodes, steps_ahead)
+        super().__init__(managed_point, target, canvas_dim, blocks, gap_between_nodes, steps_ahead, incremental,
+                         block_index=block_index)
         self._target = target
 
     def apply(self, t: float, dt: float) -> None:
@@ -23,7 +27,7 @@ class ForecastingController(AstarController):
     def update(self, t: float, dt: float) -> Vect2d:
         self._destination_point = self._predict()
 
-        astar_path = self._get_astar_path()
+        astar_path = self._get_astar_path(self._path_horizon())
 
         if len(astar_path) > 1:
             next_point = Vect2d(0, 0)
@@ -60,7 +64,7 @@ class ForecastingController(AstarController):
 
         if len(astar_path) == 1:
             f = -1 * self.f
-            self.f *= 0
+            self.f = Vect2d(0, 0)
             return f
 
     def _predict(self) -> Vect2d:
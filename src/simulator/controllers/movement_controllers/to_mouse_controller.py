@@ -30,7 +30,7 @@ class ToMouseController(BaseController):
             if self.f_act:
                 self._managed_point.subtract_force(self.f)
                 self.f_act = False
-                self.f *= 0
+                self.f = Vect2d(0, 0)
 
     def update(self, t: float, dt: float) -> Vect2d:
         raise NotImplementedError("ToMouseController does not implement update()")
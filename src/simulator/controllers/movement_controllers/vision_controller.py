@@ -1,12 +1,12 @@
-import networkx as nx
-import heapq
+import warnings
 
 import numpy as np
 
-import src.simulator.utils.helpers as hlp
 from src.simulator.utils.vision_node import VisionNode
+from src.simulator.utils.visibility_raster import VisibilityRaster, view_directions
 from simulator.controllers.movement_controllers.astar_controller import AstarController
 from src.simulator.objects.block import Block
+from src.simulator.utils.block_index import BlockIndex
 from src.simulator.objects.point_mass import PointMass
 from src.simulator.utils.vect_2d import Vect2d
 
@@ -25,15 +25,25 @@ class VisionController(AstarController):
                  crossroads_score: int = 100,
                  known_score: int = 1000,
                  edge_threshold: int = 4,
-                 priority_queue_size: int = 1000
+                 priority_queue_size: int = None,
+                 view_step: float = 1,
+                 block_index: BlockIndex = None
                  ):
+        # priority_queue_size: deprecated and ignored, the target is chosen from the knowledge masks
+        if priority_queue_size is not None:
+            warnings.warn(
+                "VisionController priority_queue_size is deprecated and ignored",
+                DeprecationWarning,
+                stacklevel=2
+            )
         super().__init__(
             managed_point,
             destination_point,
             canvas_dim,
             blocks,
             gap_between_nodes,
-            steps_ahead
+            steps_ahead,
+            block_index=block_index
         )
         self._blocks: [Block] = blocks  # [m]
         self._managed_point: PointMass = managed_point
@@ -50,136 +60,81 @@ class VisionController(AstarController):
         self._crossroads_score = crossroads_score
         # VISION
         self._edge_threshold = edge_threshold
-        self._priority_queue_size = priority_queue_size
-        self._vision_nodes = set({(x, y) for x in range(self._canvas_dim.x) for y in range(self._canvas_dim.y)
-                                  if (x, y) in self._graph})
-        self._target_nodes = self._vision_nodes.copy()
-        self._visited_nodes = set()
-        self._seen_crossroads = set()
-        self._crossroads_threshold = 3
-        self._previous_len = 0
-        self._priority_queue = []
+        self._view_step = view_step  # [m]
+        self._visibility = VisibilityRaster(self._canvas_dim, self._blocks)
+        self._view_directions = view_directions(range(0, 360, self._angle_step))
+        # knowledge map over the integer cells of the canvas: cells worth exploring,
+        # cells still to explore and cells already seen
+        vision_shape = (self._canvas_dim.x + 1, self._canvas_dim.y + 1)
+        walkable = self._grid.walkable[:self._canvas_dim.x, :self._canvas_dim.y]
+        self._vision_mask = np.zeros(vision_shape, dtype=bool)
+        self._vision_mask[:walkable.shape[0], :walkable.shape[1]] = walkable
+        self._target_mask = self._vision_mask.copy()
+        self._visited_mask = np.zeros(vision_shape, dtype=bool)
+        self._target: VisionNode | None = None
 
     def apply(self, t, dt) -> None:
         d_f = self.update(t, dt)
         self._managed_point.add_force(d_f)
 
     def update(self, t, dt) -> Vect2d:
-        self._priority_queue = []
         self._clear_target_nodes()
-        for angle in range(0, 360, self._angle_step):
-            self._view_length(angle)
+        self._update_view()
         self._target_update()
         # @TODO: sprawdzić, czy to działa
         return super().update(t, dt)
 
+    def _destination_cell(self) -> tuple[int, int] | None:
+        # the destination is in the knowledge map only if it lies on a cell of the canvas
+        x, y = self._destination_point.x, self._destination_point.y
+        if x != int(x) or y != int(y) or not (0 <= x <= self._canvas_dim.x and 0 <= y <= self._canvas_dim.y):
+            return None
+        return int(x), int(y)
+
+    def _update_view(self) -> None:
+        # all rays of the field of view are cast at once, each ray stops at the edge of the canvas,
+        # at a block or at the destination
+        cells, at_destination = self._visibility.cast(
+            (self._managed_point.x, self._managed_point.y),
+            self._view_directions,
+            self._view_step,
+            (self._destination_point.x, self._destination_point.y)
+        )
+        destination = cells[at_destination]
+        self._visited_mask[destination[:, 0], destination[:, 1]] = True
 
-    def _view_length(self, angle) -> int:
-        view_length = 1
-        current_position = (self._managed_point.x, self._managed_point.y)
-        while True:
-            end_view_position = hlp.calc_end_line(
-                current_position, angle, view_length)
-            if self.view_collision(end_view_position):
-                return view_length
-            view_length += 1
-
-    def view_collision(self, cord) -> bool:
-        cord = (int(cord[0]), int(cord[1]))
-        if cord[0] < 0 or cord[0] > self._canvas_dim.x \
-                or cord[1] < 0 or cord[1] > self._canvas_dim.y:
-            return True
-        # At the edge of the map
-        if cord[0] == 0 or cord[0] == self._canvas_dim.x \
-                or cord[1] == 0 or cord[1] == self._canvas_dim.y:
-            if cord in self._target_nodes:
-                self._visited_nodes.add(cord)
-                self._target_nodes.remove(cord)
-            return True
-        # collision with block
-        for bl in self._blocks:
-            if bl.x <= cord[0] <= bl.x + bl.w and bl.y + bl.h >= cord[1] >= bl.y:
-                if cord in self._target_nodes:
-                    self._visited_nodes.add(cord)
-                    self._target_nodes.remove(cord)
-                return True
-        # found destination point
-        if int(cord[0]) == self._destination_point.x and int(cord[1]) == self._destination_point.y:
-            self._visited_nodes.add(cord)
-            return True
-        # empty space
-        if cord in self._target_nodes:
-            self._visited_nodes.add(cord)
-            self._target_nodes.remove(cord)
-        return False
+        seen = cells[~at_destination]
+        newly_seen = seen[self._target_mask[seen[:, 0], seen[:, 1]]]
+        self._visited_mask[newly_seen[:, 0], newly_seen[:, 1]] = True
+        self._target_mask[newly_seen[:, 0], newly_seen[:, 1]] = False
 
     def _clear_target_nodes(self):
-        if self._target_nodes:
-            target_node = (self._destination_point.x, self._destination_point.y)
-            if target_node not in self._visited_nodes:
-                target_node = None
-            self._target_nodes = [node for node in self._target_nodes if node not in self._visited_nodes]
-            if target_node:
-                self._target_nodes.append(target_node)
+        if self._target_mask.any():
+            destination = self._destination_cell()
+            self._target_mask &= ~self._visited_mask
+            # seen destination stays a target
+            if destination is not None and self._visited_mask[destination]:
+                self._target_mask[destination] = True
 
     def _target_update(self):
-        for node in self._target_nodes:
-            dist = hlp.calc_euclidean_dist(
-                node, (self._managed_point.x, self._managed_point.y))
-            if node[0] == self._destination_point.x and node[
-                1] == self._destination_point.y and node in self._visited_nodes:
-                heapq.heappush(self._priority_queue, (VisionNode(node, dist, self._goal_score)))
-            else:
-                heapq.heappush(self._priority_queue, (VisionNode(node, dist, self._unknown_score)))
-
-    def add_crossroads(self, view_length, angle) -> None:
-        current_position = (self._managed_point.x, self._managed_point.y)
-        end_view_position = hlp.calc_end_line(current_position, angle, view_length)
-        previous_position = hlp.calc_end_line(current_position, angle - self._angle_step, self._previous_len)
-        crossroads_position = ((end_view_position[0] + previous_position[0]) // 2,
-                               (end_view_position[1] + previous_position[1]) // 2)
-        crossroads_length = hlp.calc_euclidean_dist(crossroads_position, current_position)
-        if crossroads_position not in self._seen_crossroads \
-                and all(hlp.calc_euclidean_dist(crossroads_position, seen_position) > self._crossroads_threshold
-                        for seen_position in self._seen_crossroads):
-            heapq.heappush(self._priority_queue,
-                           VisionNode(crossroads_position, crossroads_length, self._crossroads_score))
-            self._seen_crossroads.add(crossroads_position)
-
-    def clean_current_location(self):
-        current_position = (int(self._managed_point.x), int(self._managed_point.y))
-        self._priority_queue = \
-            [node for node in self._priority_queue if hlp.calc_euclidean_dist(node.position, current_position) > 1
-             and node.heuristic_cost != self._goal_score]
-
-    def lazy_update(self) -> bool:
-        # Instead of updating all nodes each time, the agent moves,
-        # we check the value of a node when it's picked as the most desired one.
-        temporary_goal = heapq.heappop(self._priority_queue)
-        while True:
-            # if temporary_goal.heuristic_cost == self._unknown_score and \
-            #         temporary_goal.position in self._visited_nodes:
-            #     temporary_goal.heuristic_cost = self._known_score
-            updated_position = hlp.calc_euclidean_dist(temporary_goal.position,
-                                                       (self._managed_point.x, self._managed_point.y))
-            temporary_goal.distance_from_node = updated_position
-            heapq.heappush(self._priority_queue, temporary_goal)
-            if self._priority_queue[0].distance_from_node < 0.6 and \
-                    self._priority_queue[0].heuristic_cost != self._goal_score:
-                heapq.heappop(self._priority_queue)
-            elif temporary_goal == self._priority_queue[0]:
-                self._priority_queue = heapq.nsmallest(
-                    self._priority_queue_size, self._priority_queue)
-                print("goal set:", temporary_goal.position,
-                      temporary_goal.heuristic_cost, temporary_goal.distance_from_node)
-                return True
-
-            temporary_goal = heapq.heappop(self._priority_queue)
-
-    def _get_astar_path(self):
-        dest = self._priority_queue[0]
-        astar_path = nx.astar_path(
-            self._graph,
+        # the best target minimizes distance * score
+        xs, ys = np.nonzero(self._target_mask)
+        if xs.size == 0:
+            self._target = None
+            return
+        dist = np.sqrt((xs - self._managed_point.x) ** 2 + (ys - self._managed_point.y) ** 2)
+        score = np.full(xs.size, self._unknown_score)
+        destination = self._destination_cell()
+        if destination is not None and self._visited_mask[destination]:
+            score[(xs == destination[0]) & (ys == destination[1])] = self._goal_score
+        best = np.argmin(dist * score)
+        self._target = VisionNode((int(xs[best]), int(ys[best])), float(dist[best]), int(score[best]))
+
+    def _get_astar_path(self, max_length: int = None):
+        dest = self._target
+        if dest is None:
+            raise RuntimeError("No target left to explore")
+        astar_path = self._plan_path(
             self.cord_to_node(
                 tuple(self._managed_point.center),
                 find_closest_for_nonexistent=True
@@ -187,7 +142,8 @@ class VisionController(AstarController):
             self.cord_to_node(
                 tuple(dest.position),
                 find_closest_for_nonexistent=True
-            )
+            ),
+            max_length
         )
         return astar_path
 
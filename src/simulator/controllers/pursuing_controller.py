@@ -5,7 +5,9 @@ from simulator.controllers.movement_controllers.astar_controller import AstarCon
 from simulator.controllers.movement_controllers.forecasting_controller import ForecastingController
 from simulator.objects.block import Block
 from simulator.objects.point_mass import PointMass
-from simulator.utils.vect_2d import Vect2d
+from src.simulator.utils.block_index import BlockIndex
+from src.simulator.utils.vect_2d import Vect2d
+from src.simulator.utils.particle_filter import ParticleFilter
 
 import numpy as np
 
@@ -21,12 +23,23 @@ class PursuingController(BaseController):
             gap_between_nodes: float = 1 / 2,
             steps_ahead: int = 1,
             probabilistic: bool = False,
+            incremental: bool = False,
+            particle_filter: bool = False,
+            particles: int = 500,
+            forecast_time: float = 1,
+            chase_forecast: bool = False,
+            rng: np.random.Generator = None,
+            block_index: BlockIndex = None,
     ):
         super().__init__()
+        # random number generator of the simulator, so that runs with the same seed are repeatable
+        self._rng: np.random.Generator = rng if rng is not None else np.random.default_rng()
         self._managed_point: PointMass = managed_point
         self._target_point: PointMass = target_point
 
         self._probabilistic = probabilistic
+        # head to the forecast position instead of the target itself (always on with the particle filter)
+        self._chase_forecast = chase_forecast or particle_filter
 
         self._forecasting_controller = ForecastingController(
             managed_point,
@@ -34,21 +47,46 @@ class PursuingController(BaseController):
             canvas_dim,
             blocks,
             gap_between_nodes,
-            steps_ahead
+            steps_ahead,
+            incremental,
+            block_index
         )
 
+        # the belief forecast moves a little every frame, with the particle filter the path to it
+        # is reused and repaired instead of searched again in every frame
         self._astar_controller = AstarController(
             managed_point,
             target_point,
             canvas_dim,
             blocks,
             gap_between_nodes,
-            steps_ahead
+            steps_ahead,
+            incremental or particle_filter,
+            block_index=block_index
         )
 
         self._probability_matrix = np.zeros(
             (canvas_dim * int(1 / gap_between_nodes)).__tuple__()
         )
+        # walkable nodes covered by the probability matrix
+        self._walkable = self._astar_controller._grid.walkable[
+            :self._probability_matrix.shape[0],
+            :self._probability_matrix.shape[1]
+        ]
+        self._gaussian_filters: dict[tuple, np.ndarray] = {}
+
+        # belief about the target carried between frames, updated only when the target is in sight
+        self._particle_filter: ParticleFilter | None = None
+        if particle_filter:
+            self._particle_filter = ParticleFilter(
+                self._astar_controller._grid.walkable,
+                gap_between_nodes,
+                particles,
+                rng=self._rng
+            )
+        self._forecast_time: float = forecast_time  # [s]
+        # time of the last belief update, the controller may skip frames (update rate)
+        self._belief_t: float | None = None
 
         # self._used_special_case = False
 
@@ -76,30 +114,23 @@ class PursuingController(BaseController):
         #     f -=  curr_a * self._managed_point.m
         #     return f
 
-        if not self._probabilistic:
-            next_center = self._calculate_next_center_inertia(t, dt)
-        else:
+        if self._chase_forecast:
+            if self._particle_filter is not None:
+                next_center = self._calculate_next_center_belief(t, dt)
+            elif not self._probabilistic:
+                next_center = self._calculate_next_center_inertia(t, dt)
+            else:
+                ic = self._calculate_next_center_inertia(t, dt).__tuple__()
+                self._probability_matrix = self._calculate_probability_matrix(t, dt, ic)
+                k = self.sample_index(self._probability_matrix, self._rng.random())
+                if k is not None:
+                    next_center = Vect2d.from_tuple(self._astar_controller.node_to_cord(k))
+                else:
+                    next_center = Vect2d.from_tuple(ic)
+
+            # go there: the A* controller heads to the forecast instead of the target itself
+            self._astar_controller.destination_point = next_center
 
-            ic = self._calculate_next_center_inertia(t, dt).__tuple__()
-
-            self._probability_matrix = self._calculate_probability_matrix(t, dt, ic)
-            mx = self._probability_matrix
-
-            cs = np.cumsum(mx, axis=0)
-            rs = np.cumsum(mx, axis=1)
-            rc_x = np.random.rand()
-            rc_y = np.random.rand()
-            i, j = ic
-            for i in range(cs.shape[0]):
-                if rc_x < cs[i, 0]:
-                    break
-            for j in range(rs.shape[1]):
-                if rc_y < rs[0, j]:
-                    break
-            next_center = Vect2d(i, j)
-
-        # go there
-        self._astar_controller.destination_point = next_center
         astar_f = self._astar_controller.update(t, dt)
 
         f = astar_f
@@ -127,6 +158,30 @@ class PursuingController(BaseController):
         s = v * t + a * t ** 2 / 2
         return self._target_point.center + s
 
+    def target_in_sight(self) -> bool:
+        return not self._astar_controller._block_index.segment_intersects(
+            self._managed_point.center,
+            self._target_point.center
+        )
+
+    def _calculate_next_center_belief(self, t: float, dt: float) -> Vect2d:
+        pf = self._particle_filter
+        observed = self.target_in_sight()
+        if not pf.initialized:
+            if observed:
+                pf.reset(self._target_point.center.__tuple__(), self._target_point.get_velocity().__tuple__())
+            else:
+                pf.reset_uniform()
+        else:
+            pf.predict(t - self._belief_t)
+            if observed:
+                pf.observe(self._target_point.center.__tuple__(), self._target_point.get_velocity().__tuple__())
+
+        self._belief_t = t
+
+        x, y = pf.forecast(self._forecast_time)
+        return Vect2d(float(x), float(y))
+
     def _calculate_probability_matrix(self, t: float, dt: float, ic) -> np.array:
 
         cc = self._astar_controller.cord_to_node(
@@ -147,52 +202,50 @@ class PursuingController(BaseController):
 
         c = Vect2d.from_tuple(cc)
         for i in range(int(d_step)):
-            if len(
-                    [b for b in self._astar_controller._blocks if b.has_point_inside(c+d)]
-            ) > 0:
+            if self._astar_controller._block_index.has_point_inside(c + d):
                 break
             if (c+d).__lt__(Vect2d.from_singleton(0)).any() \
                     or (c+d).__gt__(self._astar_controller._canvas_dim).any():
                 break
             c += d
 
-        mx_padded = np.zeros(
-            tuple([
-                d + 2 * r for d in
-                self._probability_matrix.shape
-            ])
-        )
-
         gf = self._generate_gaussuian_filter(2 * r + 1)
 
-        from_x = int(np.floor(c.x))
-        from_y = int(np.floor(c.y))
-        mx_padded[
-            from_x: from_x + 2 * r + 1,
-            from_y: from_y + 2 * r + 1
-        ] = gf
-
-        # @FIXME: this part of the code is taking 10 times longer than the rest
-        indexes = np.where(mx_padded.flatten() > 0)
-        if len(indexes) == 0:
-            return mx_padded
-        for i in range(len(indexes[0])):
-            x = i % mx_padded.shape[0]
-            y = i // mx_padded.shape[0]
-            if mx_padded[x, y] != 0:
-                calculated_node = self._astar_controller.cord_to_node((x, y))
-                if calculated_node in self._astar_controller._graph.nodes:
-                    mx_padded[x, y] = 0
-
-        if r != 0:
-            mx_padded = mx_padded[r:-r, r:-r]
-        norm_val = sum(mx_padded.flatten())
+        # kernel centered at c (clipped to the matrix) restricted to the walkable nodes
+        mx = np.zeros(self._probability_matrix.shape)
+        from_x = int(np.floor(c.x)) - r
+        from_y = int(np.floor(c.y)) - r
+        x0, x1 = max(from_x, 0), min(from_x + 2 * r + 1, mx.shape[0])
+        y0, y1 = max(from_y, 0), min(from_y + 2 * r + 1, mx.shape[1])
+        if x0 < x1 and y0 < y1:
+            mx[x0:x1, y0:y1] = gf[x0 - from_x:x1 - from_x, y0 - from_y:y1 - from_y] * self._walkable[x0:x1, y0:y1]
+
+        norm_val = mx.sum()
         if norm_val != 0:
-            mx_padded /= norm_val
+            mx /= norm_val
 
-        return mx_padded
+        return mx
+
+    @staticmethod
+    def sample_index(mx: np.ndarray, u: float) -> tuple[int, int] | None:
+        # index of the cell of mx at the fraction u in [0, 1) of the cumulative distribution
+        # of the flattened matrix, None if the matrix is empty
+        cdf = np.cumsum(mx.ravel())
+        if not cdf.size or cdf[-1] <= 0:
+            return None
+        k = min(int(np.searchsorted(cdf, u * cdf[-1], side="right")), cdf.size - 1)
+        i, j = np.unravel_index(k, mx.shape)
+        return int(i), int(j)
 
     def _generate_gaussuian_filter(self, kernel_size: int, sigma: float = 1, muu: float = 0):
+        # kernels are cached, the returned array must not be modified
+        key = (kernel_size, sigma, muu)
+        if key not in self._gaussian_filters:
+            self._gaussian_filters[key] = self._init_gaussian_filter(kernel_size, sigma, muu)
+        return self._gaussian_filters[key]
+
+    @staticmethod
+    def _init_gaussian_filter(kernel_size: int, sigma: float = 1, muu: float = 0) -> np.ndarray:
         # Initializing value of x,y as grid of kernel size
         # in the range of kernel size
 
@@ -208,7 +261,7 @@ class PursuingController(BaseController):
         # Calculating Gaussian filter
         gauss = np.exp(-((dst - muu) ** 2 / (2.0 * sigma ** 2))) * normal
 
-        return gauss / sum(sum(gauss))
+        return gauss / gauss.sum()
 
     @staticmethod
     def get_type():
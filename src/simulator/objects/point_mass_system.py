@@ -0,0 +1,331 @@
+import numpy as np
+
+from src.simulator.utils.constants import px_in_m, eps_px, v_eps, g
+from src.simulator.utils.vect_2d import Vect2dArray
+
+
+def _to_px(value: np.ndarray) -> np.ndarray:
+    # same float to int conversion as pygame.Rect (rounding half away from zero)
+    return np.sign(value) * np.floor(np.abs(value) + 0.5)
+
+
+class PointMassSystem:
+    # structure of arrays holding the state of all point masses of a simulation,
+    # PointMass objects are views into one row of these arrays
+    # the public arrays (x, y, v_x, ...) are read-only views, the state is changed with set(),
+    # which also drops the cached accelerations that depend on the changed field
+
+    _FIELDS = ("x", "y", "v_x", "v_y", "f_x", "f_y", "m", "radius", "friction_factor", "a_x", "a_y")
+    _STATE_FIELDS = _FIELDS[:-2]
+    _ACCELERATION_INPUTS = frozenset(("v_x", "v_y", "f_x", "f_y", "m", "friction_factor"))
+
+    def __init__(self, capacity: int = 16, continuous_collision: bool = False) -> None:
+        self._size: int = 0
+        # continuous collision: time of impact with blocks is computed analytically (swept AABB)
+        # instead of checking the contact after each of 100 sections of the step;
+        # the final states differ: a point pushed against a wall stops flush with it (e.g. at x = 9.8 m
+        # for a 0.2 m point and a wall at 10 m, with v = 0), while the sectioned step leaves it hovering
+        # a few mm off the wall with a small velocity (e.g. 9.8041 m, 0.49 m/s) that the next contact zeroes;
+        # the sectioned step also misses blocks thinner than one of its sections (a point
+        # passes a 0.1 m block at 600 m/s), the swept one does not
+        self.continuous_collision: bool = continuous_collision
+        self._capacity: int = max(1, capacity)
+
+        self._x: np.ndarray = np.zeros(self._capacity)  # [m]
+        self._y: np.ndarray = np.zeros(self._capacity)  # [m]
+        self._v_x: np.ndarray = np.zeros(self._capacity)  # [m/s]
+        self._v_y: np.ndarray = np.zeros(self._capacity)  # [m/s]
+        self._f_x: np.ndarray = np.zeros(self._capacity)  # [N]
+        self._f_y: np.ndarray = np.zeros(self._capacity)  # [N]
+        self._m: np.ndarray = np.ones(self._capacity)  # [kg]
+        self._radius: np.ndarray = np.zeros(self._capacity)  # [m]
+        self._friction_factor: np.ndarray = np.zeros(self._capacity)
+
+        # accelerations (friction included) are computed once per step, a point's entry is valid until
+        # its force, velocity, mass or friction factor changes (see invalidate_accelerations)
+        self._a_x: np.ndarray = np.zeros(self._capacity)  # [m/s^2]
+        self._a_y: np.ndarray = np.zeros(self._capacity)  # [m/s^2]
+        self._a_valid: np.ndarray = np.zeros(self._capacity, dtype=bool)
+        self._update_views()
+
+        self._blocks_key: tuple[int, int] | None = None
+        self._blocks_bb: np.ndarray = np.zeros((0, 4))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, x: float, y: float, m: float, radius: float, friction_factor: float) -> int:
+        if self._size == self._capacity:
+            self._capacity *= 2
+            for field in self._FIELDS + ("a_valid",):
+                arr = getattr(self, "_" + field)
+                setattr(self, "_" + field, np.concatenate([arr, np.zeros(self._capacity - arr.size, dtype=arr.dtype)]))
+            self._update_views()
+
+        idx = self._size
+        self._x[idx] = x
+        self._y[idx] = y
+        self._v_x[idx] = 0
+        self._v_y[idx] = 0
+        self._f_x[idx] = 0
+        self._f_y[idx] = 0
+        self._m[idx] = m
+        self._radius[idx] = radius
+        self._friction_factor[idx] = friction_factor
+        self._a_valid[idx] = False
+        self._size += 1
+        return idx
+
+    def _update_views(self) -> None:
+        for field in self._FIELDS + ("a_valid",):
+            view = getattr(self, "_" + field).view()
+            view.setflags(write=False)
+            setattr(self, field, view)
+
+    def set(self, field: str, idx, value) -> None:
+        # idx: index or indices of the points
+        if field not in self._STATE_FIELDS:
+            raise ValueError(f"Unknown field '{field}', expected one of {list(self._STATE_FIELDS)}")
+        getattr(self, "_" + field)[idx] = value
+        if field in self._ACCELERATION_INPUTS:
+            self._a_valid[idx] = False
+
+    def _friction_forces(self, idx: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # vectorized PointMass.consult_friction_force applied to the resultant forces
+        friction_val = self._friction_factor[idx] * self._m[idx] * g
+
+        def consult(f, v):
+            curr_v = v * (np.abs(v) > v_eps)
+            cv = np.sign(curr_v)
+            mask = (cv != 0) | ~(np.abs(f) < friction_val)
+            cv = np.where(cv != 0, cv, np.sign(f))
+            return (f - friction_val * cv) * mask
+
+        return consult(self._f_x[idx], self._v_x[idx]), consult(self._f_y[idx], self._v_y[idx])
+
+    def get_accelerations(self, idx: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+        if idx is None:
+            idx = np.arange(self._size)
+        stale = idx[~self._a_valid[idx]]
+        if stale.size:
+            f_x, f_y = self._friction_forces(stale)
+            self._a_x[stale] = f_x / self._m[stale]
+            self._a_y[stale] = f_y / self._m[stale]
+            self._a_valid[stale] = True
+        return self._a_x[idx], self._a_y[idx]
+
+    def set_acceleration(self, idx, a_x, a_y) -> None:
+        # fills the cache with accelerations computed elsewhere (e.g. by PointMass for a single point),
+        # they stay valid until an input of the acceleration of the point changes
+        self._a_x[idx] = a_x
+        self._a_y[idx] = a_y
+        self._a_valid[idx] = True
+
+    def invalidate_accelerations(self, idx=None) -> None:
+        if idx is None:
+            self._a_valid[:] = False
+        else:
+            self._a_valid[idx] = False
+
+    def _get_blocks_bb(self, blocks) -> np.ndarray:
+        # bounding boxes [px] of the blocks as (left, top, right, bottom) rows
+        key = (id(blocks), len(blocks))
+        if key != self._blocks_key:
+            self._blocks_bb = np.array(
+                [(bl._bb.left, bl._bb.top, bl._bb.right, bl._bb.bottom) for bl in blocks],
+                dtype=float
+            ).reshape(-1, 4)
+            self._blocks_key = key
+        return self._blocks_bb
+
+    def update_positions(self, dt: float, blocks, idx: np.ndarray = None, block_index=None) -> None:
+        # block_index: BlockIndex over the same blocks, used to look up the blocks near each point
+        if idx is None:
+            idx = np.arange(self._size)
+        idx = np.asarray(idx, dtype=int)
+        if idx.size == 0:
+            return
+
+        # consult friction force and update acceleration
+        a = Vect2dArray.from_xy(*self.get_accelerations(idx))
+
+        # update velocity
+        prev_v = Vect2dArray.from_xy(self._v_x[idx], self._v_y[idx])
+        new_v = prev_v + a * dt
+        vel = new_v * (np.abs(new_v.xy) > v_eps)
+
+        # update position
+        d = prev_v * dt + a * dt ** 2 / 2
+        pos = Vect2dArray.from_xy(self._x[idx], self._y[idx])
+
+        radius = self._radius[idx]
+        bb_size = _to_px(radius * 2 * px_in_m)
+        bb_half = np.floor_divide(bb_size, 2)
+
+        # only blocks which a point can reach during this step are checked against it,
+        # the margin covers position corrections made on contact
+        blocks_bb = self._get_blocks_bb(blocks)
+        margin = eps_px + 2
+        end = (pos + d).xy
+        reach_lt = (np.minimum(pos.xy, end) - radius[:, None]) * px_in_m - margin
+        reach_rb = (np.maximum(pos.xy, end) + radius[:, None]) * px_in_m + margin
+        if block_index is None:
+            near = (blocks_bb[:, 0] < reach_rb[:, 0, None]) & (blocks_bb[:, 2] > reach_lt[:, 0, None]) \
+                & (blocks_bb[:, 1] < reach_rb[:, 1, None]) & (blocks_bb[:, 3] > reach_lt[:, 1, None])
+            # (point, block) pairs ordered by point and then by block
+            pair_p, pair_b = np.nonzero(near)
+        else:
+            # candidates from the index (1 px slack for the rounding of the block bounding boxes)
+            candidates = [
+                block_index.query_aabb(*((reach_lt[i] - 1) / px_in_m), *((reach_rb[i] + 1) / px_in_m))
+                for i in range(idx.size)
+            ]
+            pair_p = np.repeat(np.arange(idx.size), [c.size for c in candidates])
+            pair_b = np.concatenate(candidates)
+            bb = blocks_bb[pair_b]
+            near = (bb[:, 0] < reach_rb[pair_p, 0]) & (bb[:, 2] > reach_lt[pair_p, 0]) \
+                & (bb[:, 1] < reach_rb[pair_p, 1]) & (bb[:, 3] > reach_lt[pair_p, 1])
+            pair_p, pair_b = pair_p[near], pair_b[near]
+        pair_bl_lt = blocks_bb[pair_b, :2]  # (left, top)
+        pair_bl_rb = blocks_bb[pair_b, 2:]  # (right, bottom)
+
+        # the collision steps work on the (n, 2) arrays in place
+        if self.continuous_collision:
+            self._sweep(pos.xy, vel.xy, d.xy, bb_half, pair_p, pair_bl_lt, pair_bl_rb)
+        else:
+            self._step_in_sections(pos.xy, vel.xy, d.xy, radius, bb_size, bb_half, pair_p, pair_bl_lt, pair_bl_rb)
+
+        self._x[idx] = pos.x
+        self._y[idx] = pos.y
+        self._v_x[idx] = vel.x
+        self._v_y[idx] = vel.y
+        self._a_valid[idx] = False
+
+    @staticmethod
+    def _sweep(pos, vel, d, bb_half, pair_p, pair_bl_lt, pair_bl_rb) -> None:
+        # moves the points (in place) until the first contact with a block, the point is then placed
+        # next to the block, its velocity along the contact axis is zeroed and it moves along the other
+        # axis for the rest of the step; every contact stops one axis, so two passes are enough
+        half = bb_half[pair_p, None]
+        lo = pair_bl_lt - half  # block expanded by the point, the point is then just its center
+        hi = pair_bl_rb + half
+        remaining = np.ones(pos.shape[0])  # fraction of the step left
+
+        for _ in range(2):
+            move = np.where(vel != 0, d * remaining[:, None], 0)  # [m]
+            # rounding puts the points placed next to a block exactly on its edge
+            c0 = np.round(pos[pair_p] * px_in_m, 6)
+            c_move = move[pair_p] * px_in_m
+            moving = c_move != 0
+            inside = (lo < c0) & (c0 < hi)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t_lo = (lo - c0) / c_move
+                t_hi = (hi - c0) / c_move
+            t_in = np.where(moving, np.minimum(t_lo, t_hi), np.where(inside, -np.inf, np.inf))
+            t_out = np.where(moving, np.maximum(t_lo, t_hi), np.where(inside, np.inf, -np.inf))
+            enter = t_in.max(axis=1)
+            leave = t_out.min(axis=1)
+            hit = (enter < leave) & (enter >= 0) & (enter <= 1)
+            if not hit.any():
+                pos += move
+                return
+
+            # time of impact of every point, 1 for points without contact
+            toi = np.ones(pos.shape[0])
+            np.minimum.at(toi, pair_p[hit], enter[hit])
+            has_hit = np.zeros(pos.shape[0], dtype=bool)
+            has_hit[pair_p[hit]] = True
+
+            pos += move * toi[:, None]
+
+            # contacts of the earliest impact, axis 0: left / right side, axis 1: top / bottom side
+            first = hit & (enter == toi[pair_p])
+            axis_hit = first[:, None] & (t_in == enter[:, None])
+            corr = np.where(c_move > 0, (pair_bl_lt - half) / px_in_m, (pair_bl_rb + half) / px_in_m)
+            rows, axes = np.nonzero(axis_hit)
+            pos[pair_p[rows], axes] = corr[rows, axes]
+            vel[pair_p[rows], axes] = 0
+
+            remaining = np.where(has_hit, remaining * (1 - toi), 0)
+
+    @staticmethod
+    def _step_in_sections(pos, vel, d, radius, bb_size, bb_half, pair_p, pair_bl_lt, pair_bl_rb) -> None:
+        # the step is done in sections, after every section the position is corrected on contact
+        # with a block; positions of all sections are computed at once (cumulative sum gives the same
+        # floats as adding the section step one by one) and the computation is repeated from the
+        # first section with a contact for the points which had one
+        sections = 100
+        n_points = pos.shape[0]
+        remaining = np.full(n_points, sections)
+        active = np.arange(n_points)
+        while active.size:
+            n = remaining[active].max()
+            steps = np.where(vel[active] != 0, d[active] / sections, 0)
+            seq = np.empty((active.size, n + 1, 2))
+            seq[:, 0] = pos[active]
+            seq[:, 1:] = steps[:, None, :]
+            traj = np.cumsum(seq, axis=1)[:, 1:]  # (point, section, axis)
+
+            slot = np.full(n_points, -1)
+            slot[active] = np.arange(active.size)
+            pair_slot = slot[pair_p]
+            sel = pair_slot >= 0
+            kp = pair_slot[sel]
+            bl_lt = pair_bl_lt[sel][:, None, :]
+            bl_rb = pair_bl_rb[sel][:, None, :]
+
+            if kp.size == 0:
+                # no block within reach, the points just move through the remaining sections
+                pos[active] = traj[np.arange(active.size), remaining[active] - 1]
+                break
+
+            # bounding boxes [px] of the points after every section
+            lt = _to_px((traj[kp] - radius[active][kp, None, None]) * px_in_m)
+            rb = lt + bb_size[active][kp, None, None]
+            collide = (lt < bl_rb).all(axis=-1) & (rb > bl_lt).all(axis=-1)
+            # axis 0: contact of left / right side, axis 1: contact of top / bottom side
+            touch_lo = np.abs(lt - bl_rb) < eps_px / 2
+            touch_hi = np.abs(rb - bl_lt) < eps_px / 2
+            contact = collide[..., None] & (touch_lo | touch_hi) & (np.arange(n)[:, None] < remaining[active][kp, None, None])
+
+            # corrected positions: within a block the bottom (left) contact overrides the top (right) one
+            half = bb_half[active][kp, None]
+            corr = np.stack([
+                np.where(touch_lo[..., 0], (bl_rb[..., 0] + half) / px_in_m, (bl_lt[..., 0] - half) / px_in_m),
+                np.where(touch_hi[..., 1], (bl_lt[..., 1] - half) / px_in_m, (bl_rb[..., 1] + half) / px_in_m),
+            ], axis=-1)
+
+            # the correction of the last colliding block wins
+            pair_rows = np.broadcast_to(np.arange(kp.size)[:, None, None], contact.shape)
+            sections_idx = np.broadcast_to(np.arange(n)[None, :, None], contact.shape)
+            axes_idx = np.broadcast_to(np.arange(2)[None, None, :], contact.shape)
+            last = np.full((active.size, n, 2), -1)
+            np.maximum.at(
+                last,
+                (np.broadcast_to(kp[:, None, None], contact.shape)[contact], sections_idx[contact], axes_idx[contact]),
+                pair_rows[contact]
+            )
+            has_corr = last >= 0
+            corr_value = np.where(has_corr, corr[np.maximum(last, 0), np.arange(n)[:, None], np.arange(2)], -1)
+            has_corr &= corr_value != -1
+
+            # a contact matters only if it changes the state of the point
+            changes = has_corr & ((corr_value != traj) | (vel[active][:, None, :] != 0))
+            event_any = changes.any(axis=-1)
+            event = event_any.any(axis=1)
+            first = np.argmax(event_any, axis=1)
+
+            # points without contact just move through the remaining sections
+            calm_slots = np.nonzero(~event)[0]
+            calm = active[calm_slots]
+            pos[calm] = traj[calm_slots, remaining[calm] - 1]
+
+            # points with contact are corrected in the first section with a contact
+            ev_slots = np.nonzero(event)[0]
+            ev = active[ev_slots]
+            k = first[ev_slots]
+            pos[ev] = np.where(has_corr[ev_slots, k], corr_value[ev_slots, k], traj[ev_slots, k])
+            vel[ev] = np.where(has_corr[ev_slots, k], vel[ev] * 0, vel[ev])
+
+            remaining[ev] -= k + 1
+            active = ev[remaining[ev] > 0]
@@ -1,6 +1,10 @@
 import pygame
-import pandas as pd
+import numpy as np
+import copy
+import functools
 import json
+import os
+import time
 
 from simulator.controllers.escaping_controller import EscapingController
 from simulator.controllers.events_controllers.collision_controller import CollisionController
@@ -10,8 +14,17 @@ from simulator.controllers.movement_controllers.astar_controller import AstarCon
 from simulator.controllers.movement_controllers.to_mouse_controller import ToMouseController
 from simulator.controllers.pursuing_controller import PursuingController
 from src.simulator.objects.point_mass import PointMass
+from src.simulator.objects.point_mass_system import PointMassSystem
 from src.simulator.objects.block import Block
 from src.simulator.utils.vect_2d import Vect2d
+from src.simulator.utils.history_recorder import HistoryRecorder
+from src.simulator.utils.history_sink import HistorySink
+from src.simulator.utils.block_index import BlockIndex
+from src.simulator.utils.controller_scheduler import ControllerScheduler
+from src.simulator.utils.replay_log import ReplayLog
+from src.simulator.utils.frame_profiler import FrameProfiler
+from src.simulator.utils.navigation_grid import load_navigation_grids, save_navigation_grids, \
+    navigation_geometry_key
 from src.simulator.view_box import ViewBox
 from src.simulator.utils import colors
 from src.simulator.utils.constants import px_in_m
@@ -24,22 +37,55 @@ class Simulator:
                  window_h=1080,  # [px]
                  canvas_w=None,  # [m]
                  canvas_h=None,  #
-                 verbose=False
+                 verbose=False,
+                 headless=False,
+                 continuous_collision=False,
+                 seed=None,
+                 render_rate=None,  # [Hz]
+                 dirty_rects=False
                  ):
         self._FPS = 60
 
+        # the window is drawn every n-th frame (render_rate below FPS), the physics keeps the FPS;
+        # with dirty_rects only the areas of the points drawn in this and the previous frame are updated
+        if render_rate is not None and render_rate <= 0:
+            raise ValueError("Render rate must be positive")
+        self._render_every = 1 if render_rate is None else max(1, round(self._FPS / render_rate))
+        self._dirty_rects = dirty_rects
+        self._drawn_rects = []
+        self._drawn_view = None
+
+        # all randomness of the simulation comes from this generator (passed to the controllers),
+        # the seed is drawn when not given so that every run can be replayed
+        self._seed = int(np.random.SeedSequence().entropy) if seed is None else int(seed)
+        self._rng = np.random.default_rng(self._seed)
+
+        # map config the simulator was created from (needed to record a replay) and the replayed log;
+        # objects or controllers added afterwards (e.g. by a script) are not in the config, so adding them drops it
+        self._config = None
+        self._replay = None
+
+        # headless mode: no window, no input handling, no drawing
+        # and no real-time throttling (physics steps as fast as possible)
+        self._headless = headless
+
         self._root_w = window_w  # [px]
         self._root_h = window_h  # [px]
-        self._root = pygame.display.set_mode((window_w, window_h))
 
         canvas_w = 50 if canvas_w is None else canvas_w  # [m]
         canvas_h = 50 if canvas_h is None else canvas_h  # [m]
-
-        self._view_box = ViewBox(
-            pygame.Surface((canvas_w * px_in_m, canvas_h * px_in_m)),
-            x=self._root.get_width() // 2 - canvas_w * px_in_m // 2,
-            y=self._root.get_height() // 2 - canvas_h * px_in_m // 2,
-        )
+        self._canvas_w = int(canvas_w * px_in_m)  # [px]
+        self._canvas_h = int(canvas_h * px_in_m)  # [px]
+
+        self._root = None
+        self._view_box = None
+        if not self._headless:
+            self._root = pygame.display.set_mode((window_w, window_h))
+            self._view_box = ViewBox(
+                pygame.Surface((self._canvas_w, self._canvas_h)),
+                x=self._root.get_width() // 2 - canvas_w * px_in_m // 2,
+                y=self._root.get_height() // 2 - canvas_h * px_in_m // 2,
+            )
 
         self.verbose = True
 
@@ -50,71 +96,152 @@ class Simulator:
 
         self._points_by_names = {}
 
+        # grid and blocks pre-rendered at zoom 1 (one surface per grid density) and scaled to the current zoom
+        self._static_layers = {}
+        self._static_layer = None
+        self._static_layer_zoom = None
+
+        # spatial index of all blocks (borders included), blocks are static once added
+        self._block_index = BlockIndex()
+
+        # physical state of all points, updated in one batched call every frame
+        self._point_mass_system = PointMassSystem(continuous_collision=continuous_collision)
+
         self._mouse_point = self.add_point_mass(10, 10, show=False, save_history=False)  # mouse point
 
         self.focus_point = -1
         self.focusable_points = []
 
         self._controllers = []
+        self._controller_scheduler = ControllerScheduler(self._FPS)
 
-        self.add_block(-1, -1, h=self._view_box.get_height() // px_in_m + 1)
-        self.add_block(self._view_box.get_width() / px_in_m, -1, h=self._view_box.get_height() // px_in_m + 1)
-        self.add_block(-1, -1, w=self._view_box.get_width() // px_in_m + 1)
-        self.add_block(-1, self._view_box.get_height() / px_in_m, w=self._view_box.get_width() // px_in_m + 1)
+        # durations of the phases of the last 10 s of frames and of the controllers' updates,
+        # the overlay is toggled with P, cProfile is started and stopped with O
+        self._profiler = FrameProfiler(10 * self._FPS)
+        self._show_profiler = False
+        self._profiler_overlay = []
+        self._profiler_overlay_age = 0
 
-        pygame.display.set_caption("Model Pościgowy")
+        self.add_block(-1, -1, h=self._canvas_h // px_in_m + 1)
+        self.add_block(self._canvas_w / px_in_m, -1, h=self._canvas_h // px_in_m + 1)
+        self.add_block(-1, -1, w=self._canvas_w // px_in_m + 1)
+        self.add_block(-1, self._canvas_h / px_in_m, w=self._canvas_w // px_in_m + 1)
+
+        if not self._headless:
+            pygame.display.set_caption("Model Pościgowy")
 
         self._pygame_run = False
+        self._stop_reason = None  # passed to stop(), e.g. by a collision controller
+        self._steps = 0  # physics steps of the last run
+
+    def _render_static_layer(self, dense_grid):
+        canvas = pygame.Surface((self._view_box.get_width(), self._view_box.get_height()))
+        canvas.fill(colors.BLACK)
+        for i, x in enumerate(range(0, canvas.get_width(), px_in_m)):
+            if dense_grid or i % 10 == 0:
+                pygame.draw.line(canvas, colors.GRAY, (x, 0), (x, canvas.get_height()), 1 if i % 10 != 0 else 3)
+        for i, y in enumerate(range(0, canvas.get_height(), px_in_m)):
+            if dense_grid or i % 10 == 0:
+                pygame.draw.line(canvas, colors.GRAY, (0, y), (canvas.get_width(), y), 1 if i % 10 != 0 else 3)
+        for bl in self._simulation_elements['blocks']:
+            pygame.draw.rect(canvas, bl.color, bl._bb)
+        return canvas
+
+    def _get_static_layer(self):
+        # rescaled only when the zoom changes, below zoom 1 only every 10th grid line is drawn
+        zoom = self._view_box.zoom
+        if self._static_layer is None or self._static_layer_zoom != zoom:
+            dense_grid = zoom >= 1
+            if dense_grid not in self._static_layers:
+                self._static_layers[dense_grid] = self._render_static_layer(dense_grid)
+            layer = self._static_layers[dense_grid]
+            if zoom != 1:
+                layer = pygame.transform.scale(
+                    layer,
+                    (int(layer.get_width() * zoom), int(layer.get_height() * zoom))
+                )
+            self._static_layer = layer
+            self._static_layer_zoom = zoom
+        return self._static_layer
+
+    def _restore_background(self, rect):
+        self._root.fill(colors.GRAY, rect)
+        area = rect.move(-self._view_box.x, -self._view_box.y).clip(self._get_static_layer().get_rect())
+        if area.w > 0 and area.h > 0:
+            self._root.blit(self._get_static_layer(), (area.x + self._view_box.x, area.y + self._view_box.y), area)
 
     def _draw_window(self, draw_vectors=False, draw_bb=False):
-        # draw background
-        self._view_box.get_canvas().fill(colors.BLACK)
-        for i, x in enumerate(range(0, self._view_box.get_width(), px_in_m)):
-            if self._view_box.zoom >= 1 or i % 10 == 0:
-                pygame.draw.line(self._view_box.get_canvas(), colors.GRAY, (x, 0), (x, self._view_box.get_height()),
-                                 1 if i % 10 != 0 else 3)
-        for i, y in enumerate(range(0, self._view_box.get_height(), px_in_m)):
-            if self._view_box.zoom >= 1 or i % 10 == 0:
-                pygame.draw.line(self._view_box.get_canvas(), colors.GRAY, (0, y), (self._view_box.get_width(), y),
-                                 1 if i % 10 != 0 else 3)
-
-        # plot blocks
-        for bl in self._simulation_elements['blocks']:
-            pygame.draw.rect(self._view_box.get_canvas(), bl.color, bl._bb)
+        # whole window is redrawn when the view changed, otherwise (in the dirty rects mode)
+        # only the areas drawn over in the previous frame get their background back
+        view = (self._view_box.x, self._view_box.y, self._view_box.zoom)
+        full_redraw = not self._dirty_rects or view != self._drawn_view
+        if full_redraw:
+            self._root.fill(colors.GRAY)
+            self._root.blit(self._get_static_layer(), (self._view_box.x, self._view_box.y))
+        else:
+            for rect in self._drawn_rects:
+                self._restore_background(rect)
+
+        rects = self._draw_points(draw_vectors, draw_bb)
+        if self._show_profiler:
+            rects += self._draw_profiler()
 
-        # plot points
+        if full_redraw:
+            pygame.display.update()
+        else:
+            pygame.display.update(self._drawn_rects + rects)
+        self._drawn_rects = rects
+        self._drawn_view = view
+
+    def _draw_points(self, draw_vectors=False, draw_bb=False):
+        # points are drawn directly on the window, in the scale of the view box; returns the drawn areas
+        rects = []
+        zoom = self._view_box.zoom
+        scale = px_in_m * zoom
+        offset = Vect2d(self._view_box.x, self._view_box.y)
+        line_width = max(1, round(2 * zoom))
         for pt in self._simulation_elements['points']:
-            center = tuple((pt.center * px_in_m).as_ints())
             if pt.show:
+                center = tuple((pt.center * scale + offset).as_ints())
                 if draw_vectors:
-                    pygame.draw.line(self._view_box.get_canvas(), colors.BLUE, center,
-                                     tuple(((pt.center + pt._v) * px_in_m).as_ints()),
-                                     2)
-                    pygame.draw.line(self._view_box.get_canvas(), colors.GREEN, center,
-                                     tuple(((pt.center + pt.get_acceleration()) * px_in_m).as_ints()), 2)
+                    rects.append(pygame.draw.line(self._root, colors.BLUE, center,
+                                                  tuple(((pt.center + pt._v) * scale + offset).as_ints()),
+                                                  line_width))
+                    rects.append(pygame.draw.line(self._root, colors.GREEN, center,
+                                                  tuple(((pt.center + pt.get_acceleration()) * scale + offset)
+                                                        .as_ints()),
+                                                  line_width))
                 if draw_bb:
-                    pygame.draw.rect(self._view_box.get_canvas(), (255, 255, 0), pt._bb)  # bounding box
-                pygame.draw.circle(self._view_box.get_canvas(), pt.color, center, pt.radius * px_in_m)
-
-        # draw canvas on root
-        self._root.fill(colors.GRAY)
-        canv = self._view_box.get_canvas().copy()
-        canv = pygame.transform.scale(
-            canv,
-            (
-                int(canv.get_width() * self._view_box.zoom),
-                int(canv.get_height() * self._view_box.zoom)
-            )
-        )
-        self._root.blit(
-            canv,
-            (
-                self._view_box.x,
-                self._view_box.y
-            ),
-        )
-
-        pygame.display.update()
+                    rects.append(pygame.draw.rect(self._root, (255, 255, 0), pygame.Rect(  # bounding box
+                        self._view_box.x + pt._bb.x * zoom,
+                        self._view_box.y + pt._bb.y * zoom,
+                        pt._bb.w * zoom,
+                        pt._bb.h * zoom
+                    )))
+                rects.append(pygame.draw.circle(self._root, pt.color, center, pt.radius * scale))
+        return rects
+
+    def _draw_profiler(self):
+        # text is refreshed twice per second, computing the percentiles every frame would cost more than drawing
+        if not self._profiler_overlay or self._profiler_overlay_age >= self._FPS // 2:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = pygame.font.Font(None, 22)
+            lines = [f"{'[ms]':<32}{'p50':>8}{'p95':>8}{'max':>8}"]
+            for name, st in self._profiler.summary().items():
+                lines.append(f"{name:<32}{st['p50']:8.2f}{st['p95']:8.2f}{st['max']:8.2f}")
+            if self._profiler.cprofile_running:
+                lines.append("cProfile running (O to stop)")
+            self._profiler_overlay = [font.render(line, True, colors.WHITE, colors.BLACK) for line in lines]
+            self._profiler_overlay_age = 0
+        self._profiler_overlay_age += 1
+
+        rects = []
+        y = 10
+        for surface in self._profiler_overlay:
+            rects.append(self._root.blit(surface, (10, y)))
+            y += surface.get_height()
+        return rects
 
     def handle_view_box(self):
         d_move = 10 * self._view_box.zoom
@@ -154,6 +281,11 @@ class Simulator:
                     return False
                 if event.key == pygame.K_f:
                     self.focus_point = (self.focus_point + 1) % len(self.focusable_points)
+                if event.key == pygame.K_p:
+                    self._show_profiler = not self._show_profiler
+                    self._profiler_overlay = []
+                if event.key == pygame.K_o:
+                    self._toggle_cprofile()
 
         # FOCUS_POINT
         if self.focus_point != -1:
@@ -164,65 +296,176 @@ class Simulator:
 
         return True
 
-    def run(self, verbose=False):
+    def _toggle_cprofile(self):
+        if self._profiler.cprofile_running:
+            print(f"cProfile stats saved to {self._profiler.stop_cprofile()}")
+        else:
+            self._profiler.start_cprofile()
+            print("cProfile started")
+        self._profiler_overlay = []
+
+    def run(self, verbose=False, max_steps=None, max_time=None, replay_path=None, history_path=None, profile=None):
+        # max_steps: number of physics steps (frames) after which the simulation stops
+        # max_time: simulated time [s] after which the simulation stops
+        # profile: time the frame phases and controllers (get_profiler), by default only with the window
+        # replay_path: file to which the replay log of the run is saved
+        # history_path: file (.parquet, .arrow or .csv) to which the history is streamed during the run
+        #   instead of being kept in memory, run() then returns None (see history_sink.read_history)
+        if self._replay is not None and max_steps is None:
+            max_steps = self._replay.frames
+        if self._headless and max_steps is None and max_time is None:
+            raise ValueError("Headless simulation requires 'max_steps' or 'max_time'")
+
         self.verbose = verbose
         print("Initializing simulation...")
 
-        df_history = pd.DataFrame(columns=["id", "x", "y", "v_x", "v_y", "a_x", "a_y"])
+        replay_log = None
+        if replay_path is not None:
+            if self._config is None:
+                raise ValueError(
+                    "Only a simulator created from a config (and not modified with add_* methods) can record a replay")
+            replay_log = ReplayLog(self._config, self._seed, self._FPS)
+
+        history = HistoryRecorder(sink=HistorySink(history_path) if history_path is not None else None)
+        self._controller_scheduler.plan()
+
+        profiler = self._profiler
+        profiling = not self._headless if profile is None else profile
+        clock = time.perf_counter
+        controller_names = {id(c): f"controller:{self._controller_name(c)}" for c in self._controllers}
         frame = -1
+        self._steps = 0
+        # fixed timestep: the simulated time advances by dt every frame, the clock only throttles the window
+        dt = 1 / self._FPS
         self._pygame_run = True
+        self._stop_reason = None
         game_clock = pygame.time.Clock()
 
         print("Starting simulation...")
-        while self._pygame_run:  # infinite loop in which all events are being checked
-            frame += 1
-            game_clock.tick(self._FPS)  # controlling speed of main_loop
-            t = frame / float(self._FPS)
-            if t % 1 == 0:
-                if self.verbose:
-                    self._log_header(f"t = {t} [s]")
-                    # self._log(self._view_box)
-                    for pt in self._simulation_elements['points']:
-                        if pt.show:
-                            self._log(pt)
-
-            continue_run = self.handle_view_box()
-            if not continue_run:
-                break
-
-            # MOUSE POINT
-            self._mouse_point.x, self._mouse_point.y = pygame.mouse.get_pos()
-            self._mouse_point.x = (self._mouse_point.x - self._view_box.x) / self._view_box.zoom / px_in_m
-            self._mouse_point.y = (self._mouse_point.y - self._view_box.y) / self._view_box.zoom / px_in_m
-            if pygame.mouse.get_pressed()[0]:
-                self._mouse_point.m = 2
-            else:
-                self._mouse_point.m = 1
-
-            # CONTROLLERS_UPDATE
-            for c in self._controllers:
-                c.apply(t, 1 / self._FPS)
-
-            # POINTS_UPDATE
-            for pt in self._simulation_elements['points']:
-                pt.update_position(1 / self._FPS, self._simulation_elements['blocks'])
-
-                if pt.save_history:
-                    stats = pt.__dict__()
-                    df_history = pd.concat([df_history, pd.DataFrame(stats, index=[t])])
-
-            # WINDOW_DRAW
-            self._draw_window(
-                draw_vectors=True,
-                draw_bb=False
-            )
+        # the sink is closed (and its file completed) also when the run is interrupted by an exception
+        try:
+            while self._pygame_run:  # infinite loop in which all events are being checked
+                frame += 1
+                if max_steps is not None and frame >= max_steps:
+                    self._stop_reason = "max_steps"
+                    break
+                t = frame / float(self._FPS)
+                if max_time is not None and t > max_time:
+                    self._stop_reason = "max_time"
+                    break
+                if not self._headless:
+                    game_clock.tick(self._FPS)  # controlling speed of main_loop
+                frame_start = clock()
+                if t % 1 == 0:
+                    if self.verbose:
+                        self._log_header(f"t = {t} [s]")
+                        # self._log(self._view_box)
+                        for pt in self._simulation_elements['points']:
+                            if pt.show:
+                                self._log(pt)
+
+                if not self._headless:
+                    continue_run = self.handle_view_box()
+                    if not continue_run:
+                        self._stop_reason = "window"
+                        break
+
+                # MOUSE POINT
+                if self._replay is not None:
+                    mouse = self._replay.mouse_at(frame)
+                    if mouse is not None:
+                        self._set_mouse(*mouse)
+                elif not self._headless:
+                    x, y = pygame.mouse.get_pos()
+                    self._set_mouse(
+                        (x - self._view_box.x) / self._view_box.zoom / px_in_m,
+                        (y - self._view_box.y) / self._view_box.zoom / px_in_m,
+                        pygame.mouse.get_pressed()[0]
+                    )
+                if replay_log is not None:
+                    replay_log.record_mouse(frame, self._mouse_point.x, self._mouse_point.y, self._mouse_point.m > 1)
+
+                t_controllers = clock()
+                if profiling:
+                    profiler.add("input", t_controllers - frame_start)
+
+                # CONTROLLERS_UPDATE
+                # controllers with a lower update rate skip frames, their forces stay applied meanwhile
+                for c in self._controller_scheduler.due(frame):
+                    if profiling:
+                        t_c = clock()
+                        c.apply(t, dt)
+                        profiler.add(controller_names[id(c)], clock() - t_c)
+                    else:
+                        c.apply(t, dt)
+                t_physics = clock()
+                if profiling:
+                    profiler.add("controllers", t_physics - t_controllers)
+
+                # POINTS_UPDATE
+                self._point_mass_system.update_positions(
+                    dt,
+                    self._simulation_elements['blocks'],
+                    block_index=self._block_index
+                )
+                t_history = clock()
+                for pt in self._simulation_elements['points']:
+                    if pt.save_history:
+                        history.record(t, pt.__dict__())
+                t_draw = clock()
+                if profiling:
+                    profiler.add("physics", t_history - t_physics)
+                    profiler.add("history", t_draw - t_history)
+
+                # WINDOW_DRAW
+                if not self._headless and frame % self._render_every == 0:
+                    self._draw_window(
+                        draw_vectors=True,
+                        draw_bb=False
+                    )
+                    if profiling:
+                        profiler.add("draw", clock() - t_draw)
+                if profiling:
+                    profiler.add("frame", clock() - frame_start)
+                self._steps += 1
+        finally:
+            pygame.quit()
+            if history_path is not None:
+                history.close()
+
+        if profiler.cprofile_running:
+            print(f"cProfile stats saved to {profiler.stop_cprofile()}")
+        if self.verbose and profiling:
+            self._log_header("Frame timings [ms]")
+            for name, st in profiler.summary().items():
+                self._log(f"{name}: p50 {st['p50']:.3f}, p95 {st['p95']:.3f}, max {st['max']:.3f}")
+
+        if replay_log is not None:
+            replay_log.frames = self._steps
+            replay_log.save(replay_path)
+
+        if history_path is not None:
+            return None
+        return history.to_dataframe()
+
+    def stop(self, reason=None):
+        # the run ends after the current frame; the first reason given in a run is kept
+        if self._pygame_run and self._stop_reason is None:
+            self._stop_reason = reason
+        self._pygame_run = False
 
-        pygame.quit()
+    def get_stop_reason(self):
+        # reason passed to stop() in the last run, otherwise "max_steps", "max_time" or "window" (window closed)
+        return self._stop_reason
 
-        return df_history
+    def get_step_count(self):
+        # physics steps (frames) simulated in the last run
+        return self._steps
 
-    def stop(self):
-        self._pygame_run = False
+    def _set_mouse(self, x, y, pressed):
+        self._mouse_point.x = x
+        self._mouse_point.y = y
+        self._mouse_point.m = 2 if pressed else 1
 
     def add_block(self, x, y, w=1, h=1, color=colors.DARKGRAY):
         # @TODO: add check if block
@@ -232,6 +475,11 @@ class Simulator:
         id = len(self._simulation_elements['blocks'])
         bl = Block(id, x, y, w, h, color)
         self._simulation_elements['blocks'].append(bl)
+        self._block_index.add(bl)
+        self._static_layers = {}
+        self._static_layer = None
+        self._drawn_view = None
+        self._config = None
         return bl
 
     def add_point_mass(
@@ -261,7 +509,8 @@ class Simulator:
             color=color,
             show=show,
             save_history=save_history,
-            friction_factor=friction_factor
+            friction_factor=friction_factor,
+            system=self._point_mass_system
         )
         if name is not None:
             if name in self._points_by_names:
@@ -273,13 +522,14 @@ class Simulator:
         self._simulation_elements['points'].append(pt)
         if enable_focus:
             self.focusable_points.append(pt)
+        self._config = None
         return pt
 
     def get_canvas_dim(self, unit="m"):
         if unit == "m":
-            return Vect2d(self._view_box.get_width() // px_in_m, self._view_box.get_height() // px_in_m)
+            return Vect2d(self._canvas_w // px_in_m, self._canvas_h // px_in_m)
         elif unit == "px":
-            return Vect2d(self._view_box.get_width(), self._view_box.get_height())
+            return Vect2d(self._canvas_w, self._canvas_h)
         raise ValueError(f"Unit '{unit}' not supported")
 
     def get_mouse(self):
@@ -288,6 +538,12 @@ class Simulator:
     def get_mouse_point(self):
         return self._mouse_point
 
+    def get_rng(self):
+        return self._rng
+
+    def get_seed(self):
+        return self._seed
+
     def get_point_mass_by_name(self, name):
         pm = self._points_by_names.get(name)
         if pm is None:
@@ -300,19 +556,44 @@ class Simulator:
             return self._simulation_elements['blocks']
         return self._simulation_elements['blocks'][4:]
 
-    def add_controller(self, controller):
+    def get_block_index(self):
+        return self._block_index
+
+    def get_profiler(self):
+        return self._profiler
+
+    def get_point_mass_system(self):
+        return self._point_mass_system
+
+    def get_controllers(self):
+        return self._controllers
+
+    def add_controller(self, controller, update_rate=None):
+        # update_rate [Hz]: how often the controller is applied, by default every frame
         if isinstance(controller, ToMouseController):
             raise ValueError("Use 'add_to_mouse_controller' method instead")
+        if update_rate is not None:
+            controller.update_rate = update_rate
         self._controllers.append(controller)
+        self._controller_scheduler.add(controller)
+        self._config = None
 
     def add_to_mouse_controller(self, managed_point):
         mouse_point = self.get_mouse_point()
-        self._controllers.append(
-            ToMouseController(
-                managed_point,
-                mouse_point,
-            )
+        controller = ToMouseController(
+            managed_point,
+            mouse_point,
         )
+        self._controllers.append(controller)
+        self._controller_scheduler.add(controller)
+        self._config = None
+
+    @staticmethod
+    def _controller_name(controller):
+        try:
+            return controller.get_type()
+        except NotImplementedError:
+            return type(controller).__name__
 
     def _log(self, msg, indent=1):
         if self.verbose:
@@ -324,8 +605,11 @@ class Simulator:
     def get_id_to_name(self):
         return {pt.id: name for name, pt in self._points_by_names.items()}
 
+    def is_headless(self):
+        return self._headless
+
     @staticmethod
-    def from_file(path):
+    def from_file(path, headless=False, navigation_cache=False, seed=None):
         if not path.endswith(".json"):
             raise ValueError("File must be .json")
 
@@ -337,6 +621,23 @@ class Simulator:
 
         config = json.loads(json_txt)
 
+        # navigation grids are cached next to the map file, e.g. assets/labyrinth.nav.npz
+        navigation_cache_path = os.path.splitext(path)[0] + ".nav.npz" if navigation_cache else None
+        return Simulator.from_config(config, headless=headless, navigation_cache_path=navigation_cache_path, seed=seed)
+
+    @staticmethod
+    def from_replay(path, headless=False):
+        # simulator which repeats the recorded run, run() stops after the recorded number of frames
+        log = ReplayLog.load(path)
+        sim = Simulator.from_config(log.config, headless=headless, seed=log.seed)
+        if log.fps != sim._FPS:
+            raise ValueError(f"Replay recorded at {log.fps} FPS, simulator runs at {sim._FPS} FPS")
+        sim._replay = log
+        return sim
+
+    @staticmethod
+    def from_config(config, headless=False, navigation_cache_path=None, seed=None):
+        # config: parsed content of a map file
         window_w = config["window"]["w_px"]
         window_h = config["window"]["h_px"]
         canvas_w = config["canvas"]["w"]
@@ -345,7 +646,14 @@ class Simulator:
             window_w=window_w,
             window_h=window_h,
             canvas_w=canvas_w,
-            canvas_h=canvas_h
+            canvas_h=canvas_h,
+            headless=headless,
+            continuous_collision=config["physics"]["continuous_collision"]
+            if "physics" in config and "continuous_collision" in config["physics"] else False,
+            seed=seed,
+            render_rate=config["render"]["rate"] if "render" in config and "rate" in config["render"] else None,
+            dirty_rects=config["render"]["dirty_rects"]
+            if "render" in config and "dirty_rects" in config["render"] else False
         )
 
         objects = config["objects"]
@@ -377,6 +685,10 @@ class Simulator:
             )
             print(f"Added point {point['name']} at ({point['x']}, {point['y']})")
 
+        if navigation_cache_path is not None and os.path.exists(navigation_cache_path):
+            n_grids = load_navigation_grids(navigation_cache_path)
+            print(f"Loaded navigation grids ({n_grids}) from {navigation_cache_path}")
+
         controllers = config["controllers"]
         for controller in controllers:
             controllers_len_before = len(sim._controllers)
@@ -396,6 +708,7 @@ class Simulator:
                     destination_point = Vect2d(controller["destination_point"]["x"],
                                                controller["destination_point"]["y"])
                 gap_between_nodes = controller["gap_between_nodes"] if "gap_between_nodes" in controller else 1 / 2
+                incremental = controller["incremental"] if "incremental" in controller else False
                 if controller["type"] == AstarController.get_type():
                     sim.add_controller(
                         AstarController(
@@ -403,7 +716,10 @@ class Simulator:
                             destination_point,
                             sim.get_canvas_dim(),
                             sim.get_blocks(),
-                            gap_between_nodes=gap_between_nodes
+                            gap_between_nodes=gap_between_nodes,
+                            block_index=sim.get_block_index(),
+                            incremental=incremental,
+                            distance_field=controller["distance_field"] if "distance_field" in controller else False
                         )
                     )
                 elif controller["type"] == VisionController.get_type():
@@ -413,7 +729,8 @@ class Simulator:
                             destination_point,
                             sim.get_canvas_dim(),
                             sim.get_blocks(),
-                            gap_between_nodes=gap_between_nodes
+                            gap_between_nodes=gap_between_nodes,
+                            block_index=sim.get_block_index()
                         )
                     )
                 elif controller["type"] == ForecastingController.get_type():
@@ -423,7 +740,9 @@ class Simulator:
                             destination_point,
                             sim.get_canvas_dim(),
                             sim.get_blocks(),
-                            gap_between_nodes=gap_between_nodes
+                            gap_between_nodes=gap_between_nodes,
+                            block_index=sim.get_block_index(),
+                            incremental=incremental
                         )
                     )
                 elif controller["type"] == PursuingController.get_type():
@@ -434,7 +753,13 @@ class Simulator:
                             sim.get_canvas_dim(),
                             sim.get_blocks(),
                             gap_between_nodes=gap_between_nodes,
-                            probabilistic=controller["probabilistic"] if "probabilistic" in controller else False
+                            block_index=sim.get_block_index(),
+                            probabilistic=controller["probabilistic"] if "probabilistic" in controller else False,
+                            incremental=incremental,
+                            particle_filter=controller["particle_filter"] if "particle_filter" in controller else False,
+                            particles=controller["particles"] if "particles" in controller else 500,
+                            chase_forecast=controller["chase_forecast"] if "chase_forecast" in controller else False,
+                            rng=sim.get_rng()
                         )
                     )
                 elif controller["type"] == EscapingController.get_type():
@@ -446,7 +771,8 @@ class Simulator:
                             pursuing_point,
                             sim.get_canvas_dim(),
                             sim.get_blocks(),
-                            gap_between_nodes=gap_between_nodes
+                            gap_between_nodes=gap_between_nodes,
+                            block_index=sim.get_block_index()
                         )
                     )
             elif controller["type"] == CollisionController.get_type():
@@ -458,7 +784,8 @@ class Simulator:
                     raise ValueError(f"Point {controller['managed_point_B']} does not exist")
 
                 if controller["action"] == "stop_simulation":
-                    action = sim.stop
+                    reason = ("collision", controller["managed_point_A"], controller["managed_point_B"])
+                    action = functools.partial(sim.stop, reason)
                 elif controller["action"] == "log":
                     def action_print():
                         print(f"Collision between {point_a} and {point_b} detected")
@@ -478,5 +805,14 @@ class Simulator:
 
             if len(sim._controllers) == controllers_len_before:
                 raise ValueError(f"Controller {controller['type']} not supported")
+            if "update_rate" in controller:
+                sim._controllers[-1].update_rate = controller["update_rate"]
             print(f"Added controller: {controller['type']}")
+
+        if navigation_cache_path is not None:
+            save_navigation_grids(
+                navigation_cache_path,
+                navigation_geometry_key(sim.get_canvas_dim(), sim.get_blocks())
+            )
+        sim._config = copy.deepcopy(config)
         return sim
@@ -0,0 +1,153 @@
+import math
+
+import numpy as np
+
+from src.simulator.objects.block import Block
+
+
+class BlockIndex:
+    # uniform grid hash of static block rectangles [m], every cell keeps the indices of the
+    # blocks overlapping it (in the order in which the blocks were added); rectangles are closed,
+    # i.e. a point on the edge of a block is inside it, the same as in Block.has_point_inside
+
+    def __init__(self, blocks: [Block] = None, cell_size: float = 1) -> None:
+        if cell_size <= 0:
+            raise ValueError("Cell size must be positive")
+        self._cell_size: float = cell_size  # [m]
+        self._blocks: [Block] = []
+        self._bounds: [tuple[float, float, float, float]] = []  # (left, top, right, bottom) [m]
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        self._bounds_array: np.ndarray | None = None
+
+        for bl in blocks if blocks is not None else []:
+            self.add(bl)
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def __getitem__(self, i: int) -> Block:
+        return self._blocks[i]
+
+    @property
+    def bounds(self) -> np.ndarray:
+        # (left, top, right, bottom) rows of all blocks [m]
+        if self._bounds_array is None:
+            self._bounds_array = np.array(self._bounds, dtype=float).reshape(-1, 4)
+        return self._bounds_array
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self._cell_size), math.floor(y / self._cell_size)
+
+    def add(self, block: Block) -> int:
+        i = len(self._blocks)
+        bounds = (block.x, block.y, block.x + block.w, block.y + block.h)
+        self._blocks.append(block)
+        self._bounds.append(bounds)
+        self._bounds_array = None
+
+        cx0, cy0 = self._cell(bounds[0], bounds[1])
+        cx1, cy1 = self._cell(bounds[2], bounds[3])
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self._cells.setdefault((cx, cy), []).append(i)
+        return i
+
+    def _candidates(self, left: float, top: float, right: float, bottom: float) -> set[int]:
+        cx0, cy0 = self._cell(left, top)
+        cx1, cy1 = self._cell(right, bottom)
+        found = set()
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            # box bigger than the occupied part of the map
+            for (cx, cy), ids in self._cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    found.update(ids)
+            return found
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                found.update(self._cells.get((cx, cy), ()))
+        return found
+
+    def query_aabb(self, left: float, top: float, right: float, bottom: float) -> np.ndarray:
+        # sorted indices of the blocks overlapping (or touching) the box [m]
+        ids = np.fromiter(self._candidates(left, top, right, bottom), dtype=int)
+        ids.sort()
+        b = self.bounds[ids]
+        overlap = (b[:, 0] <= right) & (b[:, 2] >= left) & (b[:, 1] <= bottom) & (b[:, 3] >= top)
+        return ids[overlap]
+
+    def blocks_at(self, point) -> [Block]:
+        x, y = point
+        return [
+            self._blocks[i] for i in self._cells.get(self._cell(x, y), ())
+            if self._bounds[i][0] <= x <= self._bounds[i][2] and self._bounds[i][1] <= y <= self._bounds[i][3]
+        ]
+
+    def has_point_inside(self, point) -> bool:
+        x, y = point
+        for i in self._cells.get(self._cell(x, y), ()):
+            left, top, right, bottom = self._bounds[i]
+            if left <= x <= right and top <= y <= bottom:
+                return True
+        return False
+
+    def _segment_hits(self, i: int, x0: float, y0: float, dx: float, dy: float) -> bool:
+        # Liang-Barsky clipping of the segment by the block rectangle
+        left, top, right, bottom = self._bounds[i]
+        t0, t1 = 0.0, 1.0
+        for p, q in ((-dx, x0 - left), (dx, right - x0), (-dy, y0 - top), (dy, bottom - y0)):
+            if p == 0:
+                if q < 0:
+                    return False
+            elif p < 0:
+                t0 = max(t0, q / p)
+            else:
+                t1 = min(t1, q / p)
+            if t0 > t1:
+                return False
+        return True
+
+    def segment_intersects(self, start, end) -> bool:
+        # walks the cells crossed by the segment (Amanatides-Woo), on a corner the neighbouring
+        # cells are visited too, so every cell containing a point of the segment is checked
+        x0, y0 = start
+        x1, y1 = end
+        dx, dy = x1 - x0, y1 - y0
+        cx, cy = self._cell(x0, y0)
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+
+        def t_next_x(cx) -> float:
+            # time at which the segment reaches the next vertical cell boundary
+            return ((cx + (dx > 0)) * self._cell_size - x0) / dx if dx != 0 else math.inf
+
+        def t_next_y(cy) -> float:
+            return ((cy + (dy > 0)) * self._cell_size - y0) / dy if dy != 0 else math.inf
+
+        checked = set()
+
+        def check(cell) -> bool:
+            for i in self._cells.get(cell, ()):
+                if i not in checked:
+                    checked.add(i)
+                    if self._segment_hits(i, x0, y0, dx, dy):
+                        return True
+            return False
+
+        if check((cx, cy)):
+            return True
+        t_max_x, t_max_y = t_next_x(cx), t_next_y(cy)
+        while min(t_max_x, t_max_y) <= 1:
+            if t_max_x < t_max_y:
+                cx += step_x
+            elif t_max_y < t_max_x:
+                cy += step_y
+            else:
+                if check((cx + step_x, cy)) or check((cx, cy + step_y)):
+                    return True
+                cx += step_x
+                cy += step_y
+            if check((cx, cy)):
+                return True
+            t_max_x, t_max_y = t_next_x(cx), t_next_y(cy)
+        # the end of the segment may lie on a cell boundary
+        return check(self._cell(x1, y1))
@@ -0,0 +1,48 @@
+import math
+
+
+class ControllerScheduler:
+    # decides in which frames the controllers are applied; a controller with an update rate runs
+    # every n-th frame and its force stays applied in between (controllers add force changes),
+    # controllers with the same rate get different phases so they do not fire in the same frame
+    # the controllers still get the frame's dt: their gains are tuned per frame and the held force
+    # acts in every frame, so the controlled motion does not depend on the update rate
+
+    def __init__(self, fps: int) -> None:
+        self._fps: int = fps
+        self._controllers: list = []
+        # (controller, period [frames], phase [frames]) in the order of adding
+        self._plan: [tuple[object, int, int]] | None = None
+
+    def __len__(self) -> int:
+        return len(self._controllers)
+
+    def add(self, controller) -> None:
+        self._controllers.append(controller)
+        self._plan = None
+
+    def _period(self, controller) -> int:
+        update_rate = getattr(controller, "update_rate", None)  # [Hz]
+        if update_rate is None:
+            return 1
+        if update_rate <= 0:
+            raise ValueError("Update rate must be positive")
+        return max(1, round(self._fps / update_rate))
+
+    def plan(self) -> None:
+        # every controller gets the phase shared with the fewest already planned controllers;
+        # two controllers ever fire together iff their phases are equal modulo gcd of their periods
+        self._plan = []
+        for c in self._controllers:
+            period = self._period(c)
+            phase = min(
+                range(period),
+                key=lambda ph: sum((ph - p_ph) % math.gcd(period, p) == 0 for _, p, p_ph in self._plan)
+            )
+            self._plan.append((c, period, phase))
+
+    def due(self, frame: int) -> list:
+        # controllers to apply in the frame, in the order of adding
+        if self._plan is None:
+            self.plan()
+        return [c for c, period, phase in self._plan if frame % period == phase]
@@ -0,0 +1,77 @@
+import cProfile
+import pstats
+import time
+
+import numpy as np
+
+
+class FrameProfiler:
+    # durations of the timed parts of the frames (phases of the main loop, controllers),
+    # only the last `size` samples of every part are kept
+
+    def __init__(self, size: int = 600) -> None:
+        if size <= 0:
+            raise ValueError("Size of the profiler must be positive")
+        self._size: int = size
+        self._buffers: dict[str, np.ndarray] = {}  # ring buffers of durations [s]
+        self._counts: dict[str, int] = {}  # number of samples ever added
+
+        self._cprofile: cProfile.Profile | None = None
+
+    def add(self, name: str, seconds: float) -> None:
+        buffer = self._buffers.get(name)
+        if buffer is None:
+            buffer = self._buffers[name] = np.zeros(self._size)
+            self._counts[name] = 0
+        buffer[self._counts[name] % self._size] = seconds
+        self._counts[name] += 1
+
+    def names(self) -> [str]:
+        return list(self._buffers)
+
+    def samples(self, name: str) -> np.ndarray:
+        # kept durations [s] from the oldest
+        if name not in self._buffers:
+            raise ValueError(f"No samples of '{name}'")
+        count = self._counts[name]
+        if count <= self._size:
+            return self._buffers[name][:count].copy()
+        return np.roll(self._buffers[name], -(count % self._size))
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        # {name: {count, mean, p50, p95, max}}, durations in [ms]
+        summary = {}
+        for name in self._buffers:
+            s = self.samples(name) * 1e3
+            summary[name] = {
+                "count": self._counts[name],
+                "mean": float(s.mean()),
+                "p50": float(np.percentile(s, 50)),
+                "p95": float(np.percentile(s, 95)),
+                "max": float(s.max()),
+            }
+        return summary
+
+    def clear(self) -> None:
+        self._buffers = {}
+        self._counts = {}
+
+    @property
+    def cprofile_running(self) -> bool:
+        return self._cprofile is not None
+
+    def start_cprofile(self) -> None:
+        if self._cprofile is not None:
+            raise RuntimeError("cProfile is already running")
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    def stop_cprofile(self, path: str = None) -> str:
+        # saves the collected stats (for pstats or snakeviz), returns the path of the file
+        if self._cprofile is None:
+            raise RuntimeError("cProfile is not running")
+        self._cprofile.disable()
+        path = time.strftime("simulator_%Y%m%d_%H%M%S.prof") if path is None else path
+        pstats.Stats(self._cprofile).dump_stats(path)
+        self._cprofile = None
+        return path
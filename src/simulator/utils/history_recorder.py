@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from src.simulator.utils.history_sink import HistorySink
+
+
+class HistoryRecorder:
+    COLUMNS = ["id", "x", "y", "v_x", "v_y", "a_x", "a_y"]
+
+    def __init__(
+            self,
+            columns: [str] = None,
+            initial_capacity: int = 1024,
+            sink: HistorySink = None,
+            batch_rows: int = 65536
+    ) -> None:
+        self._columns: [str] = list(self.COLUMNS if columns is None else columns)
+        self._size: int = 0
+
+        # with a sink the rows are passed to it in batches of batch_rows (memory stays bounded),
+        # otherwise the arrays grow until the history is taken with to_dataframe
+        self._sink: HistorySink | None = sink
+        self._capacity: int = max(1, batch_rows if sink is not None else initial_capacity)
+
+        # one growable array per column, rows are (t, point) samples
+        self._t: np.ndarray = np.empty(0)
+        self._data: dict[str, np.ndarray] = {}
+        self._allocate()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _allocate(self) -> None:
+        self._t = np.empty(self._capacity, dtype=float)
+        self._data = {
+            col: np.empty(self._capacity, dtype=int if col == "id" else float)
+            for col in self._columns
+        }
+
+    def _grow(self) -> None:
+        self._capacity *= 2
+        self._t = np.resize(self._t, self._capacity)
+        for col in self._columns:
+            self._data[col] = np.resize(self._data[col], self._capacity)
+
+    def flush(self) -> None:
+        # passes the recorded rows to the sink, which takes over the arrays
+        if self._sink is None:
+            raise RuntimeError("History recorder has no sink")
+        self._sink.write(self._t[:self._size], {col: self._data[col][:self._size] for col in self._columns})
+        self._size = 0
+        self._allocate()
+
+    def close(self) -> None:
+        # writes the rest of the rows and waits for the sink; the columns are written even without rows
+        if self._sink is None:
+            return
+        if self._size or not self._sink.rows:
+            self.flush()
+        self._sink.close()
+
+    def record(self, t: float, stats: dict) -> None:
+        if self._size == self._capacity:
+            if self._sink is not None:
+                self.flush()
+            else:
+                self._grow()
+        self._t[self._size] = t
+        for col in self._columns:
+            self._data[col][self._size] = stats[col]
+        self._size += 1
+
+    def clear(self) -> None:
+        self._size = 0
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {col: self._data[col][:self._size].copy() for col in self._columns},
+            index=self._t[:self._size].copy(),
+            columns=self._columns
+        )
@@ -0,0 +1,125 @@
+import os
+import queue
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional, needed only for Parquet and Arrow files
+    pa = None
+
+_FORMATS = {
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+    ".csv": "csv",
+}
+
+
+def history_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in _FORMATS:
+        raise ValueError(f"Unsupported history file '{path}', expected one of {list(_FORMATS)}")
+    return _FORMATS[ext]
+
+
+class HistorySink:
+    # writes batches of history rows to a file in a background thread while the simulation runs;
+    # at most `max_batches` batches wait for writing, a full queue blocks the simulation
+    # formats: Parquet (one row group per batch) and Arrow IPC (both need pyarrow), CSV
+
+    def __init__(self, path: str, max_batches: int = 4) -> None:
+        self.format: str = history_format(path)
+        if self.format != "csv" and pa is None:
+            raise ValueError(f"Writing history to {path} requires pyarrow, install it or use a .csv file")
+        self.path: str = path
+        self.rows: int = 0  # rows passed to the sink
+        self._batches: int = 0  # batches written
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_batches))
+        self._error: BaseException | None = None
+        self._closed: bool = False
+        self._writer = None
+        self._thread = threading.Thread(target=self._run, name="history-sink", daemon=True)
+        self._thread.start()
+
+    def write(self, t: np.ndarray, columns: dict[str, np.ndarray]) -> None:
+        # the arrays are owned by the sink afterwards, they must not be modified by the caller
+        if self._closed:
+            raise RuntimeError("History sink is closed")
+        self._put((t, columns))
+        self.rows += t.size
+
+    def close(self) -> None:
+        # waits until everything is written
+        if self._closed:
+            return
+        self._closed = True
+        self._put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise RuntimeError(f"Writing history to {self.path} failed") from self._error
+
+    def _put(self, item) -> None:
+        # the timeout keeps the simulation from waiting forever for a writer which failed
+        while True:
+            if self._error is not None:
+                raise RuntimeError(f"Writing history to {self.path} failed") from self._error
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self) -> None:
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                self._write_batch(*item)
+        except BaseException as e:
+            self._error = e
+        finally:
+            try:
+                self._finish()
+            except BaseException as e:
+                self._error = self._error or e
+
+    def _write_batch(self, t: np.ndarray, columns: dict[str, np.ndarray]) -> None:
+        if self.format == "csv":
+            first = self._batches == 0
+            pd.DataFrame(columns, index=t).to_csv(
+                self.path, mode="w" if first else "a", header=first, index_label="t"
+            )
+        else:
+            table = pa.table({"t": t, **columns})
+            if self._writer is None:
+                if self.format == "parquet":
+                    self._writer = pa.parquet.ParquetWriter(self.path, table.schema)
+                else:
+                    self._writer = pa.ipc.new_file(self.path, table.schema)
+            self._writer.write_table(table)
+        self._batches += 1
+
+    def _finish(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def read_history(path: str) -> pd.DataFrame:
+    # history file as the DataFrame returned by Simulator.run (time as the index)
+    fmt = history_format(path)
+    if fmt == "csv":
+        df = pd.read_csv(path, index_col="t", float_precision="round_trip")
+    elif fmt == "parquet":
+        df = pd.read_parquet(path).set_index("t")
+    else:
+        df = pd.read_feather(path).set_index("t")
+    df.index.name = None
+    return df
@@ -0,0 +1,345 @@
+import hashlib
+import heapq
+import math
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+
+# (dx, dy, cost) of the moves allowed on the grid, diagonal weight matches the graph controllers
+_NEIGHBOUR_MOVES = (
+    (-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+    (-1, -1, 1.5), (-1, 1, 1.5), (1, -1, 1.5), (1, 1, 1.5),
+)
+_DIAGONAL_COST = 1.5
+_DISTANCE_FIELDS_CACHE_SIZE = 16
+_GRID_CACHE_SIZE = 8
+
+# grids shared by all controllers using the same map and resolution, see get_navigation_grid;
+# least recently used are dropped first, so simulators created one after another (e.g. in a batch)
+# do not keep the grids of all previous maps alive
+# the grids keep the scratch state of their A* search, so the cache (and every simulator using it)
+# must be used from a single thread; the batch runner uses processes, each with its own cache
+_grid_cache: OrderedDict[str, "NavigationGrid"] = OrderedDict()
+
+
+class NavigationGrid:
+    def __init__(self, walkable: np.ndarray, graph: nx.Graph = None) -> None:
+        # walkable[x, y] is True if node (x, y) exists in the navigation graph
+        # the grid is shared between controllers, so the map is read-only
+        # (the search state below is reused by every search, which is not thread-safe)
+        self._walkable: np.ndarray = np.array(walkable, dtype=bool)
+        self._walkable.setflags(write=False)
+        self._shape: tuple[int, int] = self._walkable.shape
+        self._graph: nx.Graph | None = graph
+        self._nodes: [tuple[int, int]] | None = None
+        self._nearest_walkable: np.ndarray | None = None
+        # distance fields of static goals, least recently used are dropped first
+        self._distance_fields: OrderedDict[tuple[int, int], np.ndarray] = OrderedDict()
+
+        # flat (x * h + y) views used by the search
+        self._walkable_flat: list[bool] = self._walkable.ravel().tolist()
+        n = self._walkable.size
+        self._g: list[float] = [math.inf] * n
+        self._parent: list[int] = [-1] * n
+        self._seen: list[int] = [0] * n  # search id in which g/parent were set
+        self._closed: list[int] = [0] * n  # search id in which the node was closed
+        self._search_id: int = 0
+
+    @staticmethod
+    def from_blocks(shape: tuple[int, int], blocks, gap_between_nodes: float):
+        # node (x, y) is removed if its position lies inside a block (borders included)
+        walkable = np.ones(shape, dtype=bool)
+        xs = np.arange(shape[0]) * gap_between_nodes
+        ys = np.arange(shape[1]) * gap_between_nodes
+        for block in blocks:
+            x_from = np.searchsorted(xs, block.x, side="left")
+            x_to = np.searchsorted(xs, block.x + block.w, side="right")
+            y_from = np.searchsorted(ys, block.y, side="left")
+            y_to = np.searchsorted(ys, block.y + block.h, side="right")
+            walkable[x_from:x_to, y_from:y_to] = False
+        return NavigationGrid(walkable)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self._shape
+
+    @property
+    def walkable(self) -> np.ndarray:
+        return self._walkable
+
+    @property
+    def graph(self) -> nx.Graph:
+        # networkx view of the grid, only built when something asks for it (e.g. plotting)
+        if self._graph is None:
+            w = self._walkable
+
+            def pairs(mask, offset_from, offset_to):
+                xs, ys = np.nonzero(mask)
+                return zip(
+                    zip((xs + offset_from[0]).tolist(), (ys + offset_from[1]).tolist()),
+                    zip((xs + offset_to[0]).tolist(), (ys + offset_to[1]).tolist())
+                )
+
+            graph = nx.Graph()
+            graph.add_nodes_from(self.nodes())
+            graph.add_edges_from(pairs(w[:-1, :] & w[1:, :], (0, 0), (1, 0)))
+            graph.add_edges_from(pairs(w[:, :-1] & w[:, 1:], (0, 0), (0, 1)))
+            graph.add_edges_from(pairs(w[:-1, :-1] & w[1:, 1:], (0, 0), (1, 1)), weight=_DIAGONAL_COST)
+            graph.add_edges_from(pairs(w[:-1, 1:] & w[1:, :-1], (0, 1), (1, 0)), weight=_DIAGONAL_COST)
+            self._graph = graph
+        return self._graph
+
+    def nodes(self) -> [tuple[int, int]]:
+        if self._nodes is None:
+            self._nodes = [tuple(n) for n in np.argwhere(self._walkable).tolist()]
+        return self._nodes
+
+    @property
+    def nearest_walkable(self) -> np.ndarray:
+        # nearest_walkable[x, y] is the walkable node closest to node (x, y)
+        if self._nearest_walkable is None:
+            self._nearest_walkable = self._init_nearest_walkable()
+        return self._nearest_walkable
+
+    def _init_nearest_walkable(self) -> np.ndarray:
+        if not self._walkable.any():
+            raise ValueError("Navigation grid has no walkable nodes")
+
+        # every node stores the coordinates of the closest walkable node found so far,
+        # those are propagated from neighbours at decreasing distances (jump flooding)
+        # and finally from the direct neighbours until nothing improves
+        w, h = self._shape
+        xs, ys = np.meshgrid(np.arange(w, dtype=np.int32), np.arange(h, dtype=np.int32), indexing="ij")
+        src_x = np.where(self._walkable, xs, -1).astype(np.int32)
+        src_y = np.where(self._walkable, ys, -1).astype(np.int32)
+        dist = np.where(self._walkable, 0, np.iinfo(np.int32).max).astype(np.int32)
+
+        def propagate(step) -> bool:
+            changed = False
+            for dx, dy, _ in _NEIGHBOUR_MOVES:
+                dx, dy = dx * step, dy * step
+                # on grids narrower than the step the move has no source (a negative slice stop would wrap)
+                if abs(dx) >= w or abs(dy) >= h:
+                    continue
+                # node (x, y) takes the source of node (x + dx, y + dy)
+                to_x = slice(max(0, -dx), w - max(0, dx))
+                to_y = slice(max(0, -dy), h - max(0, dy))
+                from_x = slice(max(0, dx), w - max(0, -dx))
+                from_y = slice(max(0, dy), h - max(0, -dy))
+
+                cand_x = src_x[from_x, from_y]
+                cand_y = src_y[from_x, from_y]
+                cand_dist = (xs[to_x, to_y] - cand_x) ** 2 + (ys[to_x, to_y] - cand_y) ** 2
+                better = (cand_x >= 0) & (cand_dist < dist[to_x, to_y])
+                if better.any():
+                    src_x[to_x, to_y][better] = cand_x[better]
+                    src_y[to_x, to_y][better] = cand_y[better]
+                    dist[to_x, to_y][better] = cand_dist[better]
+                    changed = True
+            return changed
+
+        step = 1 << (max(w, h).bit_length() - 1)
+        while step > 1:
+            step //= 2
+            propagate(step)
+        while propagate(1):
+            pass
+
+        nearest = np.stack([src_x, src_y], axis=-1)
+        nearest.setflags(write=False)
+        return nearest
+
+    def closest_walkable(self, node: tuple[int, int]) -> tuple[int, int]:
+        x = min(max(node[0], 0), self._shape[0] - 1)
+        y = min(max(node[1], 0), self._shape[1] - 1)
+        cx, cy = self.nearest_walkable[x, y]
+        return int(cx), int(cy)
+
+    def is_walkable(self, node: tuple[int, int]) -> bool:
+        x, y = node
+        return 0 <= x < self._shape[0] and 0 <= y < self._shape[1] and bool(self._walkable[x, y])
+
+    def astar_path(
+            self,
+            start: tuple[int, int],
+            goal: tuple[int, int],
+            max_cost: float = None
+    ) -> [tuple[int, int]]:
+        # max_cost: the search stops early and returns None if the path would be longer,
+        # only the nodes within that distance from start and goal are expanded
+        if not self.is_walkable(start):
+            raise ValueError(f"Start node {start} is not walkable")
+        if not self.is_walkable(goal):
+            raise ValueError(f"Goal node {goal} is not walkable")
+
+        w, h = self._shape
+        walkable = self._walkable_flat
+        g = self._g
+        parent = self._parent
+        seen = self._seen
+        closed = self._closed
+
+        # search ids make resetting the per-node arrays unnecessary
+        self._search_id += 1
+        sid = self._search_id
+
+        start_i = start[0] * h + start[1]
+        goal_i = goal[0] * h + goal[1]
+        gx, gy = goal
+
+        diagonal_extra = _DIAGONAL_COST - 1
+        heappush, heappop = heapq.heappush, heapq.heappop
+
+        g[start_i] = 0.0
+        parent[start_i] = -1
+        seen[start_i] = sid
+        hx, hy = abs(start[0] - gx), abs(start[1] - gy)
+        open_heap = [(max(hx, hy) + diagonal_extra * min(hx, hy), 0.0, start_i)]
+        while open_heap:
+            f_curr, g_curr, curr = heappop(open_heap)
+            if max_cost is not None and f_curr > max_cost:
+                return None
+            if closed[curr] == sid:
+                continue
+            if curr == goal_i:
+                return self._reconstruct_path(goal_i)
+            closed[curr] = sid
+
+            cx, cy = divmod(curr, h)
+            for dx, dy, cost in _NEIGHBOUR_MOVES:
+                nx, ny = cx + dx, cy + dy
+                if nx < 0 or nx >= w or ny < 0 or ny >= h:
+                    continue
+                n = nx * h + ny
+                if not walkable[n] or closed[n] == sid:
+                    continue
+                g_new = g_curr + cost
+                if seen[n] != sid or g_new < g[n]:
+                    g[n] = g_new
+                    parent[n] = curr
+                    seen[n] = sid
+                    # octile distance to the goal, inlined
+                    hx = nx - gx if nx > gx else gx - nx
+                    hy = ny - gy if ny > gy else gy - ny
+                    if hx > hy:
+                        heappush(open_heap, (g_new + (hx + diagonal_extra * hy), g_new, n))
+                    else:
+                        heappush(open_heap, (g_new + (hy + diagonal_extra * hx), g_new, n))
+
+        raise ValueError(f"No path between {start} and {goal}")
+
+    def distance_field(self, goal: tuple[int, int]) -> np.ndarray:
+        # field[x, y] is the length of the shortest path from node (x, y) to the goal
+        field = self._distance_fields.get(goal)
+        if field is None:
+            field = self._init_distance_field(goal)
+            self._distance_fields[goal] = field
+            if len(self._distance_fields) > _DISTANCE_FIELDS_CACHE_SIZE:
+                self._distance_fields.popitem(last=False)
+        else:
+            self._distance_fields.move_to_end(goal)
+        return field
+
+    def _init_distance_field(self, goal: tuple[int, int]) -> np.ndarray:
+        if not self.is_walkable(goal):
+            raise ValueError(f"Goal node {goal} is not walkable")
+
+        # reverse Dijkstra from the goal, edges are undirected
+        w, h = self._shape
+        walkable = self._walkable_flat
+        dist = [math.inf] * self._walkable.size
+        goal_i = goal[0] * h + goal[1]
+        dist[goal_i] = 0.0
+        open_heap = [(0.0, goal_i)]
+        while open_heap:
+            d_curr, curr = heapq.heappop(open_heap)
+            if d_curr > dist[curr]:
+                continue
+            cx, cy = divmod(curr, h)
+            for dx, dy, cost in _NEIGHBOUR_MOVES:
+                nx, ny = cx + dx, cy + dy
+                if nx < 0 or nx >= w or ny < 0 or ny >= h:
+                    continue
+                n = nx * h + ny
+                d_new = d_curr + cost
+                if walkable[n] and d_new < dist[n]:
+                    dist[n] = d_new
+                    heapq.heappush(open_heap, (d_new, n))
+
+        field = np.array(dist).reshape(self._shape)
+        field.setflags(write=False)
+        return field
+
+    def descend(self, field: np.ndarray, start: tuple[int, int], max_length: int = None) -> [tuple[int, int]]:
+        # follows the distance field from start to its goal (at most max_length nodes)
+        if not self.is_walkable(start) or math.isinf(field[start]):
+            raise ValueError(f"No path from {start} in the distance field")
+
+        w, h = self._shape
+        path = [start]
+        cx, cy = start
+        d_curr = field[cx, cy]
+        while d_curr > 0 and (max_length is None or len(path) < max_length):
+            # steepest descent: the neighbour which lies on a shortest path to the goal
+            best, d_best = None, math.inf
+            for dx, dy, cost in _NEIGHBOUR_MOVES:
+                nx, ny = cx + dx, cy + dy
+                if 0 <= nx < w and 0 <= ny < h and field[nx, ny] + cost < d_best:
+                    best, d_best = (nx, ny), field[nx, ny] + cost
+            cx, cy = best
+            d_curr = field[cx, cy]
+            path.append(best)
+        return path
+
+    def _reconstruct_path(self, goal_i: int) -> [tuple[int, int]]:
+        h = self._shape[1]
+        path = []
+        curr = goal_i
+        while curr != -1:
+            path.append(divmod(curr, h))
+            curr = self._parent[curr]
+        path.reverse()
+        return path
+
+
+def navigation_geometry_key(canvas_dim, blocks) -> str:
+    geometry = (tuple(canvas_dim), tuple((bl.x, bl.y, bl.w, bl.h) for bl in blocks))
+    return hashlib.sha1(repr(geometry).encode()).hexdigest()
+
+
+def navigation_grid_key(canvas_dim, blocks, gap_between_nodes: float) -> str:
+    return f"{navigation_geometry_key(canvas_dim, blocks)}_{float(gap_between_nodes)!r}"
+
+
+def get_navigation_grid(key: str, build: callable) -> NavigationGrid:
+    # build is only called if no grid with this key was built or loaded before
+    grid = _grid_cache.get(key)
+    if grid is None:
+        grid = build()
+        _cache_grid(key, grid)
+    else:
+        _grid_cache.move_to_end(key)
+    return grid
+
+
+def _cache_grid(key: str, grid: NavigationGrid) -> None:
+    _grid_cache[key] = grid
+    _grid_cache.move_to_end(key)
+    while len(_grid_cache) > _GRID_CACHE_SIZE:
+        _grid_cache.popitem(last=False)
+
+
+def load_navigation_grids(path: str) -> int:
+    with np.load(path) as data:
+        for key in data.files:
+            if key not in _grid_cache:
+                _cache_grid(key, NavigationGrid(data[key]))
+        return len(data.files)
+
+
+def save_navigation_grids(path: str, geometry_key: str) -> int:
+    grids = {key: grid.walkable for key, grid in _grid_cache.items() if key.startswith(geometry_key + "_")}
+    if grids:
+        np.savez_compressed(path, **grids)
+    return len(grids)
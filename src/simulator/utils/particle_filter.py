@@ -0,0 +1,114 @@
+import numpy as np
+
+
+class ParticleFilter:
+    # belief about the position and velocity of a point as a fixed number of particles;
+    # particles move with random accelerations and cannot enter nodes which are not walkable
+
+    def __init__(
+            self,
+            walkable: np.ndarray,
+            gap_between_nodes: float,
+            n_particles: int = 500,
+            acceleration_noise: float = 2,  # [m/s^2]
+            position_noise: float = 0.25,  # [m]
+            velocity_noise: float = 0.5,  # [m/s]
+            rng: np.random.Generator = None,
+    ) -> None:
+        if n_particles <= 0:
+            raise ValueError("Number of particles must be positive")
+        self._walkable: np.ndarray = walkable
+        self._gap_between_nodes: float = gap_between_nodes  # [m]
+        self._n: int = n_particles
+        self._acceleration_noise: float = acceleration_noise
+        self._position_noise: float = position_noise
+        self._velocity_noise: float = velocity_noise
+        self._rng: np.random.Generator = rng if rng is not None else np.random.default_rng()
+
+        self._pos: np.ndarray = np.zeros((n_particles, 2))  # [m]
+        self._vel: np.ndarray = np.zeros((n_particles, 2))  # [m/s]
+        self._weights: np.ndarray = np.full(n_particles, 1 / n_particles)
+        self._initialized: bool = False
+
+    @property
+    def initialized(self) -> bool:
+        return self._initialized
+
+    @property
+    def particles(self) -> np.ndarray:
+        return self._pos
+
+    def _is_walkable(self, pos: np.ndarray) -> np.ndarray:
+        nodes = np.floor(pos / self._gap_between_nodes).astype(int)
+        inside = (nodes >= 0).all(axis=1) & (nodes < self._walkable.shape).all(axis=1)
+        nodes = np.clip(nodes, 0, np.array(self._walkable.shape) - 1)
+        return inside & self._walkable[nodes[:, 0], nodes[:, 1]]
+
+    def reset(self, position: tuple[float, float], velocity: tuple[float, float]) -> None:
+        # all particles at the observed state
+        self._pos[:] = position
+        self._vel[:] = velocity
+        self._weights[:] = 1 / self._n
+        self._initialized = True
+
+    def reset_uniform(self) -> None:
+        # no knowledge: particles spread over the walkable nodes, at rest
+        xs, ys = np.nonzero(self._walkable)
+        k = self._rng.integers(0, xs.size, self._n)
+        self._pos[:] = (np.stack([xs[k], ys[k]], axis=1) + self._rng.random((self._n, 2))) * self._gap_between_nodes
+        self._vel[:] = 0
+        self._weights[:] = 1 / self._n
+        self._initialized = True
+
+    def predict(self, dt: float) -> None:
+        acc = self._rng.normal(0, self._acceleration_noise, (self._n, 2))
+        pos = self._pos + self._vel * dt + acc * dt ** 2 / 2
+        vel = self._vel + acc * dt
+        # particles hitting a wall stay where they were and stop
+        ok = self._is_walkable(pos)
+        self._pos[ok] = pos[ok]
+        self._vel[ok] = vel[ok]
+        self._vel[~ok] = 0
+
+    def observe(self, position: tuple[float, float], velocity: tuple[float, float]) -> None:
+        d_pos = ((self._pos - position) ** 2).sum(axis=1) / (2 * self._position_noise ** 2)
+        d_vel = ((self._vel - velocity) ** 2).sum(axis=1) / (2 * self._velocity_noise ** 2)
+        if d_pos.min() > 3 ** 2 / 2:
+            # no particle within three standard deviations, the track was lost
+            self.reset(position, velocity)
+            return
+        # the shift by the maximum keeps the weights from underflowing, it cancels out in normalization
+        with np.errstate(divide="ignore"):
+            log_w = np.log(self._weights) - d_pos - d_vel
+        weights = np.exp(log_w - log_w.max())
+        self._weights = weights / weights.sum()
+
+        # systematic resampling when the belief degenerates
+        if 1 / (self._weights ** 2).sum() < self._n / 2:
+            cdf = np.cumsum(self._weights)
+            u = (self._rng.random() + np.arange(self._n)) / self._n
+            idx = np.minimum(np.searchsorted(cdf, u * cdf[-1]), self._n - 1)
+            self._pos = self._pos[idx]
+            self._vel = self._vel[idx]
+            self._weights = np.full(self._n, 1 / self._n)
+
+    def estimate(self) -> tuple[np.ndarray, np.ndarray]:
+        # weighted mean position [m] and velocity [m/s]
+        return self._weights @ self._pos, self._weights @ self._vel
+
+    def forecast(self, time: float, steps: int = 10) -> np.ndarray:
+        # weighted mean position [m] after the particles move with their velocities for the given time;
+        # a mean which is not walkable (e.g. particles on both sides of a wall) is replaced by the particle
+        # closest to it
+        pos = self._pos.copy()
+        vel = self._vel.copy()
+        dt = time / steps
+        for _ in range(steps):
+            moved = pos + vel * dt
+            ok = self._is_walkable(moved)
+            pos[ok] = moved[ok]
+            vel[~ok] = 0
+        mean = self._weights @ pos
+        if self._is_walkable(mean[None])[0]:
+            return mean
+        return pos[np.argmin(((pos - mean) ** 2).sum(axis=1))]
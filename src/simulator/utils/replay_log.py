@@ -0,0 +1,49 @@
+import json
+
+
+class ReplayLog:
+    # everything needed to repeat a run exactly: map config, seed of the simulator's random number generator
+    # and the mouse input; the mouse is stored only in the frames in which it changed
+
+    def __init__(self, config: dict, seed: int, fps: int) -> None:
+        self.config: dict = config
+        self.seed: int = seed
+        self.fps: int = fps
+        self.frames: int = 0  # number of simulated frames
+        self._mouse: [list] = []  # [frame, x [m], y [m], pressed]
+        self._mouse_by_frame: dict[int, tuple] | None = None
+
+    def record_mouse(self, frame: int, x: float, y: float, pressed: bool) -> None:
+        if self._mouse and self._mouse[-1][1:] == [x, y, pressed]:
+            return
+        self._mouse.append([frame, x, y, pressed])
+        self._mouse_by_frame = None
+
+    def mouse_at(self, frame: int) -> tuple[float, float, bool] | None:
+        # mouse state set in the frame, None if it did not change
+        if self._mouse_by_frame is None:
+            self._mouse_by_frame = {f: (x, y, pressed) for f, x, y, pressed in self._mouse}
+        return self._mouse_by_frame.get(frame)
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({
+                "config": self.config,
+                "seed": self.seed,
+                "fps": self.fps,
+                "frames": self.frames,
+                "mouse": self._mouse,
+            }, f)
+
+    @staticmethod
+    def load(path: str) -> "ReplayLog":
+        with open(path, "r") as f:
+            data = json.load(f)
+        for key in ["config", "seed", "fps", "frames", "mouse"]:
+            if key not in data:
+                raise ValueError(f"Invalid replay file {path}: missing '{key}'")
+        log = ReplayLog(data["config"], data["seed"], data["fps"])
+        log.frames = data["frames"]
+        for frame, x, y, pressed in data["mouse"]:
+            log.record_mouse(frame, x, y, pressed)
+        return log
@@ -1,7 +1,11 @@
+import math
+
 import numpy as np
 
 
 class Vect2d:
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y) -> None:
         self.x = x
         self.y = y
@@ -37,6 +41,44 @@ class Vect2d:
             return Vect2d(self.x / other, self.y / other)
         raise RuntimeError()
 
+    # in-place versions modify the vector instead of creating a new one, every reference to it sees the change;
+    # getters (PointMass.center, get_velocity, get_acceleration) return new vectors, so the results can be modified
+    def __iadd__(self, other):
+        if type(other) is int or type(other) is float:
+            self.x += other
+            self.y += other
+        else:
+            self.x += other.x
+            self.y += other.y
+        return self
+
+    def __isub__(self, other):
+        if type(other) is int or type(other) is float:
+            self.x -= other
+            self.y -= other
+        else:
+            self.x -= other.x
+            self.y -= other.y
+        return self
+
+    def __imul__(self, other):
+        if type(other) is int or type(other) is float:
+            self.x = other * self.x
+            self.y = other * self.y
+        else:
+            self.x *= other.x
+            self.y *= other.y
+        return self
+
+    def __itruediv__(self, other):
+        if type(other) is int or type(other) is float:
+            if other == 0:
+                raise ZeroDivisionError()
+            self.x /= other
+            self.y /= other
+            return self
+        raise RuntimeError()
+
     def __pow__(self, power, modulo=None):
         return Vect2d(self.x ** power, self.y ** power)
 
@@ -80,19 +122,19 @@ class Vect2d:
         return Vect2d(self.x, self.y)
 
     def compare(self, other) -> (int, int):
-        gt_x, gt_y = self > other
-        eq_x, eq_y = self == other
-
-        gt_x = 1 if gt_x else -1
-        gt_y = 1 if gt_y else -1
-
-        c_x = 0 if eq_x else gt_x
-        c_y = 0 if eq_y else gt_y
+        if type(other) is int or type(other) is float:
+            return (Vect2d.compare_values(self.x, other), Vect2d.compare_values(self.y, other))
+        return (Vect2d.compare_values(self.x, other.x), Vect2d.compare_values(self.y, other.y))
 
-        return (c_x, c_y)
+    @staticmethod
+    def compare_values(a, b) -> int:
+        # -1, 0 or 1 like the coordinates of compare()
+        if a == b:
+            return 0
+        return 1 if a > b else -1
 
     def norm(self):
-        return float(np.sqrt(self.x ** 2 + self.y ** 2))
+        return math.hypot(self.x, self.y)
 
     def distance(self, other):
         return (self - other).norm()
@@ -122,3 +164,108 @@ class Vect2d:
 
     def __str__(self):
         return f"({round(self.x, 2)},{round(self.y, 2)})"
+
+
+class Vect2dArray:
+    # many vectors as one (n, 2) array, arithmetic is done for all of them at once;
+    # the other operand can be a number, a Vect2d, an array of n numbers, an (n, 2) array or a Vect2dArray
+    __slots__ = ("xy",)
+
+    def __init__(self, xy) -> None:
+        self.xy: np.ndarray = np.array(xy, dtype=float).reshape(-1, 2)
+
+    @staticmethod
+    def _wrap(xy: np.ndarray) -> "Vect2dArray":
+        # result of an operation, a new float (n, 2) array which does not have to be copied
+        arr = Vect2dArray.__new__(Vect2dArray)
+        arr.xy = xy
+        return arr
+
+    @staticmethod
+    def from_vects(vects: [Vect2d]) -> "Vect2dArray":
+        return Vect2dArray([(v.x, v.y) for v in vects])
+
+    @staticmethod
+    def from_xy(x: np.ndarray, y: np.ndarray) -> "Vect2dArray":
+        return Vect2dArray._wrap(np.stack([x, y], axis=1).astype(float, copy=False))
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.xy[:, 0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.xy[:, 1]
+
+    def __len__(self) -> int:
+        return self.xy.shape[0]
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return Vect2d(float(self.xy[item, 0]), float(self.xy[item, 1]))
+        return Vect2dArray(self.xy[item])
+
+    def __iter__(self):
+        for x, y in self.xy.tolist():
+            yield Vect2d(x, y)
+
+    def to_vects(self) -> [Vect2d]:
+        return list(self)
+
+    @staticmethod
+    def _operand(other):
+        # checked by attributes, the module is imported under two names (simulator. and src.simulator.)
+        if hasattr(other, "xy"):
+            return other.xy
+        if hasattr(other, "x") and hasattr(other, "y"):
+            return np.array([other.x, other.y])
+        if isinstance(other, np.ndarray) and other.ndim == 1:
+            return other[:, None]
+        if isinstance(other, np.ndarray) and other.ndim == 2:
+            return other
+        if type(other) is int or type(other) is float or isinstance(other, np.floating):
+            return other
+        raise RuntimeError()
+
+    def __add__(self, other):
+        return Vect2dArray._wrap(self.xy + Vect2dArray._operand(other))
+
+    def __sub__(self, other):
+        return Vect2dArray._wrap(self.xy - Vect2dArray._operand(other))
+
+    def __mul__(self, other):
+        return Vect2dArray._wrap(self.xy * Vect2dArray._operand(other))
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        return Vect2dArray._wrap(self.xy / Vect2dArray._operand(other))
+
+    def __iadd__(self, other):
+        self.xy += Vect2dArray._operand(other)
+        return self
+
+    def __isub__(self, other):
+        self.xy -= Vect2dArray._operand(other)
+        return self
+
+    def __imul__(self, other):
+        self.xy *= Vect2dArray._operand(other)
+        return self
+
+    def __itruediv__(self, other):
+        self.xy /= Vect2dArray._operand(other)
+        return self
+
+    def norm(self) -> np.ndarray:
+        return np.hypot(self.xy[:, 0], self.xy[:, 1])
+
+    def distance(self, other) -> np.ndarray:
+        return (self - other).norm()
+
+    def copy(self):
+        return Vect2dArray(self.xy)
+
+    def __str__(self):
+        return f"Vect2dArray({len(self)})"
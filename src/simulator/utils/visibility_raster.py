@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+
+from src.simulator.objects.block import Block
+from src.simulator.utils.vect_2d import Vect2d
+
+
+def view_directions(angles: [float]) -> np.ndarray:
+    # unit vectors of the rays (same floats as helpers.calc_end_line)
+    return np.array([(math.cos(math.radians(a)), math.sin(math.radians(a))) for a in angles]).reshape(-1, 2)
+
+
+class VisibilityRaster:
+    # occupancy of the integer cells of the canvas, all rays of the field of view are marched at once;
+    # a ray stops at the first cell which is outside the canvas, on its edge, inside a block
+    # or at the destination, every cell before the stop (and the stop itself, if it is on the canvas) is seen
+
+    def __init__(self, canvas_dim: Vect2d, blocks: [Block]) -> None:
+        self._w: int = int(canvas_dim.x)
+        self._h: int = int(canvas_dim.y)
+
+        # cell (x, y) is blocked if the point (x, y) lies inside (or on the edge of) a block
+        self._blocked: np.ndarray = np.zeros((self._w + 1, self._h + 1), dtype=bool)
+        for bl in blocks:
+            x0, x1 = max(math.ceil(bl.x), 0), min(math.floor(bl.x + bl.w), self._w)
+            y0, y1 = max(math.ceil(bl.y), 0), min(math.floor(bl.y + bl.h), self._h)
+            if x0 <= x1 and y0 <= y1:
+                self._blocked[x0:x1 + 1, y0:y1 + 1] = True
+
+        # longest ray which can still end on the canvas
+        self._max_length: float = math.hypot(self._w, self._h) + 2
+
+    @property
+    def blocked(self) -> np.ndarray:
+        return self._blocked
+
+    def cast(
+            self,
+            origin: tuple[float, float],
+            directions: np.ndarray,
+            step: float = 1,
+            destination: tuple[float, float] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # returns unique seen cells as (n, 2) int array and mask of the cells at which a ray stopped
+        # because of the destination
+        if step <= 0:
+            raise ValueError("Step must be positive")
+        lengths = step * np.arange(1, int(math.ceil(self._max_length / step)) + 2)
+        x = origin[0] + lengths[None, :] * directions[:, 0, None]
+        y = origin[1] + lengths[None, :] * directions[:, 1, None]
+        cx = np.trunc(x).astype(int)
+        cy = np.trunc(y).astype(int)
+
+        outside = (cx < 0) | (cx > self._w) | (cy < 0) | (cy > self._h)
+        edge = (cx == 0) | (cx == self._w) | (cy == 0) | (cy == self._h)
+        blocked = self._blocked[np.clip(cx, 0, self._w), np.clip(cy, 0, self._h)]
+        at_destination = np.zeros_like(outside)
+        if destination is not None:
+            at_destination = (cx == destination[0]) & (cy == destination[1]) & ~edge & ~blocked
+        stop = outside | edge | blocked | at_destination
+
+        first_stop = np.argmax(stop, axis=1)
+        seen = (np.arange(lengths.size)[None, :] <= first_stop[:, None]) & ~outside
+
+        keys, unique_idx = np.unique(cx[seen] * (self._h + 1) + cy[seen], return_index=True)
+        cells = np.stack(np.divmod(keys, self._h + 1), axis=1)
+        return cells, at_destination[seen][unique_idx]
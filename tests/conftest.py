@@ -0,0 +1,6 @@
+import os
+import sys
+
+# modules are imported both as simulator.* and src.simulator.*, as when running from the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "src")]
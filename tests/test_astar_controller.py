@@ -0,0 +1,98 @@
+import contextlib
+import io
+
+import pytest
+
+from simulator.controllers.movement_controllers.astar_controller import AstarController
+from simulator.simulator import Simulator
+from src.simulator.utils.vect_2d import Vect2d
+
+
+def path_cost(path):
+    return sum(1.5 if a[0] != b[0] and a[1] != b[1] else 1.0 for a, b in zip(path, path[1:]))
+
+
+def make_controller():
+    # wall at x = 10 m with a gap at its bottom
+    config = {
+        "window": {"w_px": 800, "h_px": 400},
+        "canvas": {"w": 20, "h": 10},
+        "objects": {"blocks": [{"x": 10, "y": 0, "w": 1, "h": 8}], "points": [{"name": "p0", "x": 2, "y": 2}]},
+        "controllers": [],
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulator.from_config(config, headless=True, seed=0)
+    controller = AstarController(
+        sim.get_point_mass_by_name("p0"), Vect2d(18, 2), sim.get_canvas_dim(), sim.get_blocks(), incremental=True
+    )
+    searches = []
+    find_path = controller._find_path
+
+    def spy(start, goal, max_cost=None):
+        searches.append(max_cost)
+        return find_path(start, goal, max_cost)
+
+    controller._find_path = spy
+    return controller, searches
+
+
+def assert_valid(controller, path, start, goal):
+    assert path[0] == start and path[-1] == goal
+    assert all(controller._grid.is_walkable(node) for node in path)
+    assert all(max(abs(a[0] - b[0]), abs(a[1] - b[1])) == 1 for a, b in zip(path, path[1:]))
+
+
+def test_repaired_path_ends_at_new_goal():
+    controller, searches = make_controller()
+    start = (4, 4)
+    controller._plan_path(start, (12, 10))
+    assert searches == [None]
+
+    # same goal node: the path is reused without any search
+    controller._plan_path(start, (12, 10))
+    assert searches == [None]
+
+    for goal in [(13, 10), (14, 11), (14, 12)]:
+        path = controller._plan_path(start, goal)
+        assert_valid(controller, path, start, goal)
+    # only bounded searches around the goals
+    assert len(searches) == 4 and all(max_cost is not None for max_cost in searches[1:])
+    assert path_cost(path) <= path_cost(controller._grid.astar_path(start, goal)) + 2
+
+
+def test_repair_across_wall_falls_back_to_full_search():
+    controller, searches = make_controller()
+    start = (4, 4)
+    controller._plan_path(start, (19, 4))
+    # the new goal is within the replan distance, but behind the wall
+    path = controller._plan_path(start, (23, 4))
+    assert_valid(controller, path, start, (23, 4))
+    assert len(searches) == 3 and searches[1] is not None and searches[2] is None
+    assert path_cost(path) == path_cost(controller._grid.astar_path(start, (23, 4)))
+
+
+def test_start_next_to_path_rejoins_it():
+    controller, searches = make_controller()
+    path = controller._plan_path((4, 4), (12, 10))
+    # a neighbour of the second node which is not on the path
+    start = next(
+        (path[1][0] + dx, path[1][1] + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+        if (path[1][0] + dx, path[1][1] + dy) not in path
+    )
+    rejoined = controller._plan_path(start, (12, 10))
+    assert_valid(controller, rejoined, start, (12, 10))
+    assert searches == [None]
+
+    # far from the path: full search
+    controller._plan_path((30, 2), (12, 10))
+    assert searches == [None, None]
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_follows_moving_destination(incremental):
+    controller, _ = make_controller()
+    controller._incremental = incremental
+    for i in range(30):
+        controller.destination_point = Vect2d(14 + i * 0.1, 5)
+        path = controller._get_astar_path()
+        assert path[-1] == controller.cord_to_node((14 + i * 0.1, 5), find_closest_for_nonexistent=True)
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from simulator.batch import apply_params, classify_outcome, make_scenarios, run_scenario
+
+ESCAPING = {"type": "EscapingController", "managed_point": "p0", "destination_point": "exit", "pursuing_point": "p1"}
+
+
+def make_config(escaper, pursuer, exit_point=(18, 8)):
+    return {
+        "window": {"w_px": 800, "h_px": 600},
+        "canvas": {"w": 20, "h": 10},
+        "objects": {
+            "blocks": [{"x": 10, "y": 0, "h": 4}],
+            "points": [
+                {"name": "exit", "x": exit_point[0], "y": exit_point[1], "radius": 0.5},
+                {"name": "p0", "x": escaper[0], "y": escaper[1]},
+                {"name": "p1", "x": pursuer[0], "y": pursuer[1]},
+            ],
+        },
+        "controllers": [
+            dict(ESCAPING),
+            {"type": "PursuingController", "managed_point": "p1", "destination_point": "p0"},
+            {"type": "CollisionController", "managed_point_A": "p1", "managed_point_B": "p0",
+             "action": "stop_simulation"},
+            {"type": "CollisionController", "managed_point_A": "p0", "managed_point_B": "exit",
+             "action": "stop_simulation"},
+        ],
+    }
+
+
+def test_apply_params_sets_controllers_and_points():
+    config = make_config((2, 2), (2, 8))
+    changed = apply_params(config, {"PursuingController.probabilistic": True, "p1.m": 2})
+    assert changed["controllers"][1]["probabilistic"] is True
+    assert changed["objects"]["points"][2]["m"] == 2
+    # the original config is not modified
+    assert "probabilistic" not in config["controllers"][1]
+    assert "m" not in config["objects"]["points"][2]
+
+
+def test_apply_params_unknown_target():
+    with pytest.raises(ValueError):
+        apply_params(make_config((2, 2), (2, 8)), {"p7.m": 2})
+
+
+def test_make_scenarios(tmp_path):
+    paths = []
+    for name in ["a.json", "b.json"]:
+        paths.append(tmp_path / name)
+        paths[-1].write_text(json.dumps(make_config((2, 2), (2, 8))))
+    scenarios = make_scenarios(paths, [0, 1, 2], {"PursuingController.probabilistic": [True, False]}, max_time=5)
+    assert len(scenarios) == 2 * 2 * 3
+    assert [s["seed"] for s in scenarios[:3]] == [0, 1, 2]
+    assert scenarios[0]["name"] == "a.json" and scenarios[-1]["name"] == "b.json"
+    assert scenarios[0]["params"] == {"PursuingController.probabilistic": True}
+    assert scenarios[3]["config"]["controllers"][1]["probabilistic"] is False
+
+
+@pytest.mark.parametrize("reason, expected", [
+    (("collision", "p1", "p0"), (True, False)),
+    (("collision", "p0", "exit"), (False, True)),
+    (("collision", "p1", "exit"), (False, False)),
+    (None, (False, False)),
+])
+def test_classify_outcome(reason, expected):
+    assert classify_outcome(reason, ESCAPING) == expected
+
+
+def test_run_scenario_caught():
+    scenario = {"name": "caught", "config": make_config((5, 5), (5.3, 5)), "seed": 0, "max_time": 5}
+    outcome, _ = run_scenario(scenario)
+    assert outcome["caught"] and not outcome["escaped"]
+    assert outcome["capture_time"] < 1
+
+
+def test_run_scenario_escaped():
+    scenario = {"name": "escaped", "config": make_config((17.8, 8), (2, 2)), "seed": 0, "max_time": 5}
+    outcome, _ = run_scenario(scenario)
+    assert outcome["escaped"] and not outcome["caught"]
+    assert outcome["escape_time"] < 1
+
+
+def test_run_scenario_out_of_time():
+    scenario = {"name": "timeout", "config": make_config((2, 8), (2, 2), exit_point=(18, 2)), "seed": 0,
+                "max_time": 0.5}
+    outcome, _ = run_scenario(scenario)
+    assert not outcome["caught"] and not outcome["escaped"]
+    assert outcome["end_time"] == pytest.approx(0.5)
@@ -0,0 +1,55 @@
+import pytest
+
+from simulator.controllers.base_controllers.base_controller import BaseController
+from src.simulator.utils.controller_scheduler import ControllerScheduler
+
+
+class Controller(BaseController):
+    def __init__(self, update_rate=None):
+        super().__init__()
+        self.update_rate = update_rate
+        self.calls = []
+
+    def apply(self, t, dt):
+        self.calls.append((t, dt))
+
+    @staticmethod
+    def get_type():
+        return "Controller"
+
+
+def fired(scheduler, controller, frames):
+    return [frame for frame in range(frames) if controller in scheduler.due(frame)]
+
+
+def test_every_frame_by_default():
+    scheduler = ControllerScheduler(60)
+    c = Controller()
+    scheduler.add(c)
+    assert fired(scheduler, c, 5) == [0, 1, 2, 3, 4]
+
+
+def test_same_rate_gets_different_phases():
+    scheduler = ControllerScheduler(60)
+    a, b = Controller(20), Controller(20)
+    scheduler.add(a)
+    scheduler.add(b)
+    assert fired(scheduler, a, 9) == [0, 3, 6]
+    assert fired(scheduler, b, 9) == [1, 4, 7]
+
+
+def test_invalid_rate():
+    scheduler = ControllerScheduler(60)
+    scheduler.add(Controller(0))
+    with pytest.raises(ValueError):
+        scheduler.plan()
+
+
+def test_rate_limited_controller_gets_frame_dt():
+    from simulator.simulator import Simulator
+    sim = Simulator(headless=True)
+    c = Controller()
+    sim.add_controller(c, update_rate=15)
+    sim.run(max_steps=12)
+    assert [t for t, _ in c.calls] == pytest.approx([0, 4 / 60, 8 / 60])
+    assert all(dt == pytest.approx(1 / 60) for _, dt in c.calls)
@@ -0,0 +1,73 @@
+import contextlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulator.simulator import Simulator
+from src.simulator.utils.history_recorder import HistoryRecorder
+from src.simulator.utils.history_sink import HistorySink, read_history
+
+MAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "map_test.json")
+
+try:
+    import pyarrow
+except ImportError:  # Parquet and Arrow files are optional
+    pyarrow = None
+
+needs_pyarrow = pytest.mark.skipif(pyarrow is None, reason="pyarrow is not installed")
+
+
+def run(**kwargs):
+    with open(MAP, "r") as f:
+        config = json.load(f)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Simulator.from_config(config, headless=True, seed=1).run(max_steps=90, **kwargs)
+
+
+@pytest.mark.parametrize("ext", [
+    ".csv",
+    pytest.param(".parquet", marks=needs_pyarrow),
+    pytest.param(".arrow", marks=needs_pyarrow),
+])
+def test_round_trip(tmp_path, ext):
+    path = str(tmp_path / f"history{ext}")
+    assert run(history_path=path) is None
+    pd.testing.assert_frame_equal(read_history(path), run())
+
+
+def test_background_thread_flushes_and_stops(tmp_path):
+    path = str(tmp_path / "history.csv")
+    sink = HistorySink(path, max_batches=1)
+    recorder = HistoryRecorder(columns=["id", "x"], sink=sink, batch_rows=7)
+    for i in range(50):
+        recorder.record(i / 60, {"id": i % 3, "x": i * 0.5})
+    recorder.close()
+
+    assert not sink._thread.is_alive()
+    assert sink.rows == 50 and sink._batches == 8
+    df = read_history(path)
+    np.testing.assert_array_equal(df.index, np.arange(50) / 60)
+    np.testing.assert_array_equal(df["x"], np.arange(50) * 0.5)
+    with pytest.raises(RuntimeError):
+        sink.write(np.zeros(1), {"id": np.zeros(1, dtype=int), "x": np.zeros(1)})
+    sink.close()  # closing again does nothing
+
+
+def test_writer_error_is_raised(tmp_path):
+    # the directory does not exist, the writer thread fails and the error reaches the caller
+    sink = HistorySink(str(tmp_path / "missing" / "history.csv"))
+    sink.write(np.zeros(2), {"x": np.zeros(2)})
+    with pytest.raises(RuntimeError):
+        sink.close()
+    assert not sink._thread.is_alive()
+
+
+@pytest.mark.skipif(pyarrow is not None, reason="pyarrow is installed")
+@pytest.mark.parametrize("ext", [".parquet", ".arrow"])
+def test_pyarrow_formats_without_pyarrow(tmp_path, ext):
+    with pytest.raises(ValueError):
+        HistorySink(str(tmp_path / f"history{ext}"))
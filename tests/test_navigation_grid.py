@@ -0,0 +1,147 @@
+import os
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.simulator.utils import navigation_grid
+from src.simulator.utils.navigation_grid import NavigationGrid, get_navigation_grid
+
+ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets")
+
+
+def brute_force_distances(walkable: np.ndarray) -> np.ndarray:
+    # squared distance from every node to its closest walkable node
+    wx, wy = np.nonzero(walkable)
+    xs, ys = np.meshgrid(np.arange(walkable.shape[0]), np.arange(walkable.shape[1]), indexing="ij")
+    d = (xs[..., None] - wx) ** 2 + (ys[..., None] - wy) ** 2
+    return d.min(axis=-1)
+
+
+@pytest.mark.parametrize("shape", [(49, 10), (41, 11), (64, 3), (3, 64), (1, 20), (20, 1), (17, 17)])
+@pytest.mark.parametrize("density", [0.02, 0.3])
+def test_nearest_walkable_matches_brute_force(shape, density):
+    rng = np.random.default_rng(hash((shape, density)) % 2 ** 32)
+    walkable = rng.random(shape) < density
+    walkable[rng.integers(shape[0]), rng.integers(shape[1])] = True
+    grid = NavigationGrid(walkable)
+
+    nearest = grid.nearest_walkable
+    assert walkable[nearest[..., 0], nearest[..., 1]].all()
+    xs, ys = np.meshgrid(np.arange(shape[0]), np.arange(shape[1]), indexing="ij")
+    found = (xs - nearest[..., 0]) ** 2 + (ys - nearest[..., 1]) ** 2
+    np.testing.assert_array_equal(found, brute_force_distances(walkable))
+
+
+def test_closest_walkable_on_corridor():
+    walkable = np.zeros((120, 16), dtype=bool)
+    walkable[:, 7:9] = True
+    grid = NavigationGrid(walkable)
+    assert grid.closest_walkable((60, 0)) == (60, 7)
+    assert grid.closest_walkable((200, 15)) == (119, 8)
+
+
+def test_no_walkable_nodes():
+    with pytest.raises(ValueError):
+        NavigationGrid(np.zeros((4, 9), dtype=bool)).nearest_walkable
+
+
+def path_cost(path):
+    return sum(1.5 if a[0] != b[0] and a[1] != b[1] else 1.0 for a, b in zip(path, path[1:]))
+
+
+def test_distance_field_path_as_long_as_astar():
+    rng = np.random.default_rng(1)
+    walkable = rng.random((30, 20)) < 0.75
+    walkable[0, 0] = walkable[29, 19] = True
+    grid = NavigationGrid(walkable)
+    goal = (29, 19)
+    field = grid.distance_field(goal)
+    for start in zip(*np.nonzero(walkable & np.isfinite(field))):
+        start = (int(start[0]), int(start[1]))
+        descent = grid.descend(field, start)
+        assert descent[0] == start and descent[-1] == goal
+        assert path_cost(descent) == pytest.approx(path_cost(grid.astar_path(start, goal)))
+
+
+def test_descend_strictly_decreases():
+    rng = np.random.default_rng(2)
+    walkable = rng.random((25, 25)) < 0.7
+    walkable[12, 12] = True
+    grid = NavigationGrid(walkable)
+    field = grid.distance_field((12, 12))
+    for start in zip(*np.nonzero(walkable & np.isfinite(field))):
+        descent = grid.descend(field, (int(start[0]), int(start[1])))
+        distances = [field[node] for node in descent]
+        assert descent[-1] == (12, 12)
+        assert all(a > b for a, b in zip(distances, distances[1:]))
+    far = np.unravel_index(np.argmax(np.where(np.isfinite(field), field, -1)), field.shape)
+    assert len(grid.descend(field, (int(far[0]), int(far[1])), max_length=3)) == 3
+    with pytest.raises(ValueError):
+        grid.descend(field, tuple(int(i) for i in np.argwhere(~walkable)[0]))
+
+
+def test_astar_max_cost():
+    grid = NavigationGrid(np.ones((20, 20), dtype=bool))
+    assert grid.astar_path((0, 0), (10, 0), max_cost=9.5) is None
+    assert len(grid.astar_path((0, 0), (10, 0), max_cost=10)) == 11
+
+
+@pytest.mark.parametrize("name", ["map_test.json", "labyrinth.json"])
+def test_astar_costs_match_networkx(name):
+    import contextlib
+    import io
+    from simulator.controllers.movement_controllers.astar_controller import AstarController
+    from simulator.simulator import Simulator
+    from src.simulator.utils.vect_2d import Vect2d
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulator.from_file(os.path.join(ASSETS, name), headless=True, seed=0)
+    pt = sim.get_point_mass_by_name("p0")
+    grid = AstarController(pt, Vect2d(1, 1), sim.get_canvas_dim(), sim.get_blocks())._grid
+    graph = grid.graph
+    nodes = grid.nodes()
+    rng = np.random.default_rng(0)
+    for _ in range(40):
+        start, goal = (nodes[i] for i in rng.choice(len(nodes), 2))
+        if not nx.has_path(graph, start, goal):
+            with pytest.raises(ValueError):
+                grid.astar_path(start, goal)
+            continue
+        path = grid.astar_path(start, goal)
+        assert path[0] == start and path[-1] == goal
+        assert all(graph.has_edge(a, b) for a, b in zip(path, path[1:]))
+        expected = nx.astar_path(graph, start, goal, weight="weight")
+        assert path_cost(path) == path_cost(expected)
+
+
+def test_grid_cache_drops_least_recently_used(monkeypatch):
+    monkeypatch.setattr(navigation_grid, "_grid_cache", navigation_grid.OrderedDict())
+    monkeypatch.setattr(navigation_grid, "_GRID_CACHE_SIZE", 2)
+
+    def build():
+        return NavigationGrid(np.ones((2, 2), dtype=bool))
+
+    a = get_navigation_grid("a", build)
+    get_navigation_grid("b", build)
+    assert get_navigation_grid("a", build) is a
+    get_navigation_grid("c", build)
+    assert list(navigation_grid._grid_cache) == ["a", "c"]
+
+
+def test_simulation_on_long_corridor():
+    from simulator.simulator import Simulator
+    config = {
+        "window": {"w_px": 800, "h_px": 600},
+        "canvas": {"w": 60, "h": 8},
+        "objects": {
+            "blocks": [{"x": 20, "y": 0, "h": 5}, {"x": 40, "y": 3, "h": 5}],
+            "points": [{"name": "exit", "x": 58, "y": 4}, {"name": "p0", "x": 2, "y": 2}, {"name": "p1", "x": 2, "y": 6}],
+        },
+        "controllers": [
+            {"type": "EscapingController", "managed_point": "p0", "destination_point": "exit", "pursuing_point": "p1"},
+            {"type": "PursuingController", "managed_point": "p1", "destination_point": "p0"},
+        ],
+    }
+    df = Simulator.from_config(config, headless=True, seed=0).run(max_steps=120)
+    assert len(df) == 3 * 120
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.simulator.utils.particle_filter import ParticleFilter
+
+GAP = 0.5
+
+
+def two_rooms():
+    # 10 x 5 m, wall at x = 4.5-5.5 m with a door at its top
+    walkable = np.ones((20, 10), dtype=bool)
+    walkable[9:11, 2:] = False
+    return walkable
+
+
+def is_walkable(walkable, position):
+    x, y = (np.floor(np.asarray(position) / GAP)).astype(int)
+    return 0 <= x < walkable.shape[0] and 0 <= y < walkable.shape[1] and walkable[x, y]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_forecasts_stay_on_walkable_cells(seed):
+    walkable = two_rooms()
+    pf = ParticleFilter(walkable, GAP, 200, rng=np.random.default_rng(seed))
+    pf.reset_uniform()
+    for _ in range(30):
+        pf.predict(1 / 10)
+        assert pf._is_walkable(pf.particles).all()
+        assert is_walkable(walkable, pf.forecast(1))
+
+
+def test_forecast_between_rooms_is_a_particle():
+    walkable = two_rooms()
+    pf = ParticleFilter(walkable, GAP, 2, rng=np.random.default_rng(0))
+    pf.reset((4, 3), (0, 0))
+    pf._pos[1] = (6, 3)  # the mean (5, 3) lies in the wall
+    forecast = pf.forecast(1)
+    assert is_walkable(walkable, forecast)
+    assert tuple(forecast) in {(4, 3), (6, 3)}
+
+
+def test_observe_concentrates_belief():
+    pf = ParticleFilter(two_rooms(), GAP, 300, rng=np.random.default_rng(0))
+    pf.reset_uniform()
+    for _ in range(5):
+        pf.predict(1 / 10)
+        pf.observe((2, 1), (0, 0))
+    position, _ = pf.estimate()
+    assert np.linalg.norm(position - (2, 1)) < 0.5
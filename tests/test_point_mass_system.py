@@ -0,0 +1,212 @@
+import contextlib
+import io
+import os
+
+import numpy as np
+import pygame
+import pytest
+
+from src.simulator.objects.point_mass import PointMass
+from src.simulator.objects.point_mass_system import PointMassSystem
+from src.simulator.utils.constants import px_in_m, eps_px, v_eps
+from src.simulator.utils.vect_2d import Vect2d
+
+ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets")
+DT = 1 / 60
+
+
+def sign(value: float) -> int:
+    return 0 if value == 0 else (1 if value > 0 else -1)
+
+
+class ReferencePoint:
+    # PointMass.update_position as it was before the point mass system: one point at a time,
+    # the step in 100 sections with the position corrected after each of them
+
+    def __init__(self, x, y, m, radius, friction_factor):
+        self.x, self.y = x, y
+        self.m, self.radius, self.friction_factor = m, radius, friction_factor
+        self.v_x = self.v_y = 0.0
+        self.f_x = self.f_y = 0.0
+        self.bb = pygame.Rect(0, 0, 0, 0)
+
+    def acceleration(self):
+        friction_val = self.friction_factor * self.m * 9.81
+        a = []
+        for f, v in ((self.f_x, self.v_x), (self.f_y, self.v_y)):
+            cv = sign(v * int(abs(v) > v_eps))
+            mask = int(abs(cv) or not abs(f) < abs(friction_val))
+            cv = cv if cv != 0 else sign(f)
+            a.append((f - friction_val * cv) * mask / self.m)
+        return a
+
+    def update_position(self, dt, block_rects):
+        a_x, a_y = self.acceleration()
+        prev_v_x, prev_v_y = self.v_x, self.v_y
+        new_v_x, new_v_y = self.v_x + a_x * dt, self.v_y + a_y * dt
+        self.v_x = new_v_x * int(abs(new_v_x) > v_eps)
+        self.v_y = new_v_y * int(abs(new_v_y) > v_eps)
+        d_x = prev_v_x * dt + a_x * dt ** 2 / 2
+        d_y = prev_v_y * dt + a_y * dt ** 2 / 2
+
+        sections = 100
+        for _ in range(sections):
+            if abs(self.v_x) > 0:
+                self.x += d_x / sections
+            if abs(self.v_y) > 0:
+                self.y += d_y / sections
+            self.update_bb()
+            corr_x, corr_y = self.collision_correction(block_rects)
+            if corr_x != -1:
+                self.x = corr_x
+                self.v_x *= 0
+            if corr_y != -1:
+                self.y = corr_y
+                self.v_y *= 0
+        self.update_bb()
+
+    def collision_correction(self, block_rects):
+        corr_x, corr_y = -1, -1
+        for i in self.bb.collidelistall(block_rects):
+            bl = block_rects[i]
+            if abs(self.bb.top - bl.bottom) < eps_px / 2:
+                corr_y = (bl.bottom + self.bb.h // 2) / px_in_m
+            if abs(self.bb.bottom - bl.top) < eps_px / 2:
+                corr_y = (bl.top - self.bb.h // 2) / px_in_m
+            if abs(self.bb.right - bl.left) < eps_px / 2:
+                corr_x = (bl.left - self.bb.w // 2) / px_in_m
+            if abs(self.bb.left - bl.right) < eps_px / 2:
+                corr_x = (bl.right + self.bb.w // 2) / px_in_m
+        return corr_x, corr_y
+
+    def update_bb(self):
+        self.bb.x = (self.x - self.radius) * px_in_m
+        self.bb.y = (self.y - self.radius) * px_in_m
+        self.bb.w = self.radius * 2 * px_in_m
+        self.bb.h = self.radius * 2 * px_in_m
+
+
+def load_map(name):
+    from simulator.simulator import Simulator
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulator.from_file(os.path.join(ASSETS, name), headless=True)
+    return sim
+
+
+@pytest.mark.parametrize("name", ["map_test.json", "labyrinth.json"])
+@pytest.mark.parametrize("use_index", [False, True])
+def test_matches_per_point_integration(name, use_index):
+    sim = load_map(name)
+    blocks = sim.get_blocks(include_borders=True)
+    block_rects = [bl._bb for bl in blocks]
+    canvas = sim.get_canvas_dim()
+    rng = np.random.default_rng(0)
+
+    system = PointMassSystem()
+    points, references = [], []
+    for i in range(6):
+        x, y = rng.uniform(1, canvas.x - 1), rng.uniform(1, canvas.y - 1)
+        m, radius, friction_factor = rng.uniform(0.5, 2), rng.uniform(0.1, 0.5), rng.uniform(0, 0.1)
+        points.append(PointMass(i, x, y, m, radius, friction_factor=friction_factor, system=system))
+        references.append(ReferencePoint(x, y, m, radius, friction_factor))
+
+    for frame in range(180):
+        if frame % 15 == 0:
+            # force changes as added by the controllers
+            for pt, ref in zip(points, references):
+                f_x, f_y = rng.normal(0, 4, 2)
+                pt.add_force(Vect2d(f_x, f_y))
+                ref.f_x, ref.f_y = ref.f_x + f_x, ref.f_y + f_y
+        system.update_positions(DT, blocks, block_index=sim.get_block_index() if use_index else None)
+        for ref in references:
+            ref.update_position(DT, block_rects)
+
+    for pt, ref in zip(points, references):
+        assert (pt.x, pt.y) == (ref.x, ref.y)
+        assert (pt.get_velocity().x, pt.get_velocity().y) == (ref.v_x, ref.v_y)
+
+
+def test_public_arrays_are_read_only():
+    system = PointMassSystem(capacity=1)
+    for i in range(3):  # growing the arrays keeps the views read-only
+        system.add(i, 0, 1, 0.2, 5e-2)
+    with pytest.raises(ValueError):
+        system.f_x[0] = 1
+    with pytest.raises(ValueError):
+        system.x[:] = 0
+
+
+def test_set_invalidates_acceleration():
+    system = PointMassSystem()
+    pt = PointMass(0, 1, 1, m=2, friction_factor=0, system=system)
+    assert pt.get_acceleration().x == 0
+    system.set("f_x", 0, 4)
+    assert pt.get_acceleration().x == 2
+    system.set("m", [0], 4)
+    a_x, _ = system.get_accelerations()
+    assert a_x[0] == 1
+    with pytest.raises(ValueError):
+        system.set("a_x", 0, 0)
+
+
+def test_getters_return_new_vectors():
+    # Vect2d in-place operators modify the vector, the point's state must not change through them
+    pt = PointMass(0, 1, 2)
+    pt.add_force(Vect2d(3, 0))
+    for getter in (lambda: pt.center, pt.get_velocity, pt.get_acceleration):
+        v = getter()
+        v += Vect2d(10, 10)
+        v *= 0
+    assert (pt.x, pt.y) == (1, 2)
+    assert (pt.get_velocity().x, pt.get_velocity().y) == (0, 0)
+    assert pt.get_acceleration().x > 0
+
+
+def test_set_acceleration_fills_cache():
+    system = PointMassSystem()
+    pt = PointMass(0, 1, 1, m=2, friction_factor=0, system=system)
+    system.set_acceleration(0, 7, -1)
+    assert (pt.get_acceleration().x, pt.get_acceleration().y) == (7, -1)
+    # valid until an input changes
+    system.set("x", 0, 3)
+    assert system.get_accelerations()[0][0] == 7
+    pt.add_force(Vect2d(4, 0))
+    assert (pt.get_acceleration().x, pt.get_acceleration().y) == (2, 0)
+
+
+@pytest.mark.parametrize("v_x, expected", [(600.0, 16.8), (1200.0, 16.8), (-600.0, 17.3)])
+def test_swept_collision_does_not_tunnel(v_x, expected):
+    from src.simulator.objects.block import Block
+    thin = [Block(0, 17, 0, 0.1, 10)]  # 5 px wide
+    for continuous_collision in (False, True):
+        system = PointMassSystem(continuous_collision=continuous_collision)
+        pt = PointMass(0, 5 if v_x > 0 else 30, 5, radius=0.2, friction_factor=0, system=system)
+        system.set("v_x", 0, v_x)
+        for _ in range(3):
+            system.update_positions(DT, thin)
+        if continuous_collision:
+            # stopped flush with the block
+            assert pt.x == pytest.approx(expected) and pt.get_velocity().x == 0
+        else:
+            # a section of the step is longer than the block
+            assert (pt.x > 17.1) if v_x > 0 else (pt.x < 17)
+
+
+@pytest.mark.parametrize("continuous_collision", [False, True])
+def test_point_pushed_against_wall(continuous_collision):
+    from src.simulator.objects.block import Block
+    wall = [Block(0, 10, 0, 1, 10)]
+    system = PointMassSystem(continuous_collision=continuous_collision)
+    pt = PointMass(0, 5, 5, radius=0.2, system=system)
+    pt.add_force(Vect2d(3, 0))
+    xs = []
+    for _ in range(300):
+        system.update_positions(DT, wall)
+        xs.append(pt.x)
+    assert max(xs) < 9.81
+    if continuous_collision:
+        assert xs[-1] == pytest.approx(9.8) and pt.get_velocity().x == 0
+        assert all(x == pytest.approx(9.8) for x in xs[-60:])
+    else:
+        # hovers next to the wall
+        assert xs[-1] == pytest.approx(9.8, abs=0.01)
@@ -0,0 +1,182 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from simulator.controllers.pursuing_controller import PursuingController
+from simulator.simulator import Simulator
+from src.simulator.utils.vect_2d import Vect2d
+
+
+def make_controller(**kwargs):
+    config = {
+        "window": {"w_px": 400, "h_px": 400},
+        "canvas": {"w": 10, "h": 10},
+        "objects": {
+            "blocks": [{"x": 5, "y": 3, "w": 1, "h": 4}, {"x": 1, "y": 8, "w": 3, "h": 1}],
+            "points": [{"name": "p0", "x": 3, "y": 5}, {"name": "p1", "x": 8, "y": 2}],
+        },
+        "controllers": [],
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulator.from_config(config, headless=True, seed=0)
+    target, managed = sim.get_point_mass_by_name("p0"), sim.get_point_mass_by_name("p1")
+    controller = PursuingController(managed, target, sim.get_canvas_dim(), sim.get_blocks(), rng=sim.get_rng(),
+                                    **kwargs)
+    return controller, target
+
+
+def reference_matrix(controller, target, ic):
+    # the loop implementation the matrix was vectorized from (with the cell index and the walkable
+    # test of its mask loop fixed): kernel placed in a padded matrix, then masked cell by cell
+    astar = controller._astar_controller
+    cc = astar.cord_to_node(target.center.__tuple__())
+    ic = astar.cord_to_node(ic)
+    dx, dy = ic[0] - cc[0], ic[1] - cc[1]
+    r = int(np.sqrt(dx ** 2 + dy ** 2))
+    d_step = min(abs(dx), abs(dy))
+    d = Vect2d(dx / d_step if d_step != 0 else 0, dy / d_step if d_step != 0 else 0)
+    c = Vect2d.from_tuple(cc)
+    for _ in range(int(d_step)):
+        if len([b for b in astar._blocks if b.has_point_inside(c + d)]) > 0:
+            break
+        if (c + d).__lt__(Vect2d.from_singleton(0)).any() or (c + d).__gt__(astar._canvas_dim).any():
+            break
+        c += d
+
+    shape = controller._probability_matrix.shape
+    mx_padded = np.zeros(tuple(s + 2 * r for s in shape))
+    from_x, from_y = int(np.floor(c.x)), int(np.floor(c.y))
+    mx_padded[from_x:from_x + 2 * r + 1, from_y:from_y + 2 * r + 1] = \
+        PursuingController._init_gaussian_filter(2 * r + 1)
+    for x in range(mx_padded.shape[0]):
+        for y in range(mx_padded.shape[1]):
+            node = (x - r, y - r)
+            inside = 0 <= node[0] < shape[0] and 0 <= node[1] < shape[1]
+            if mx_padded[x, y] != 0 and not (inside and astar._grid.is_walkable(node)):
+                mx_padded[x, y] = 0
+    mx = mx_padded[r:mx_padded.shape[0] - r, r:mx_padded.shape[1] - r]
+    norm_val = sum(mx.flatten())
+    if norm_val != 0:
+        mx /= norm_val
+    return mx
+
+
+def reference_sample(mx, u):
+    # cell by cell walk over the cumulative distribution
+    total = mx.sum()
+    if total <= 0:
+        return None
+    acc = 0.0
+    last = None
+    for i in range(mx.shape[0]):
+        for j in range(mx.shape[1]):
+            acc += mx[i, j]
+            if u * total < acc:
+                return i, j
+            last = i, j
+    return last
+
+
+@pytest.mark.parametrize("ic", [(3, 5), (4.5, 6.5), (7, 5), (0.5, 9.5), (2, 9), (9.5, 0.5)])
+def test_probability_matrix_matches_loop(ic):
+    controller, target = make_controller()
+    # twice, the second time with the cached kernels
+    for _ in range(2):
+        mx = controller._calculate_probability_matrix(0, 1 / 60, ic)
+        expected = reference_matrix(controller, target, ic)
+        np.testing.assert_allclose(mx, expected, rtol=1e-12, atol=1e-15)
+    assert controller._generate_gaussuian_filter(5) is controller._generate_gaussuian_filter(5)
+
+
+def test_probability_matrix_only_on_walkable_nodes():
+    controller, target = make_controller()
+    mx = controller._calculate_probability_matrix(0, 1 / 60, (7, 5))
+    assert mx.sum() == pytest.approx(1)
+    assert not mx[~controller._walkable].any()
+
+
+def test_sampling_matches_loop():
+    rng = np.random.default_rng(0)
+    mx = rng.random((6, 5)) * (rng.random((6, 5)) > 0.5)
+    for u in list(rng.random(200)) + [0.0, 1 - 1e-12]:
+        assert PursuingController.sample_index(mx, u) == reference_sample(mx, u)
+    assert PursuingController.sample_index(np.zeros((3, 3)), 0.5) is None
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"probabilistic": True}])
+def test_chases_target_by_default(kwargs):
+    controller, target = make_controller(**kwargs)
+    controller.update(0, 1 / 60)
+    assert controller._astar_controller.destination_point is target
+
+
+@pytest.mark.parametrize("kwargs", [{"chase_forecast": True}, {"chase_forecast": True, "probabilistic": True}])
+def test_chase_forecast(kwargs):
+    controller, target = make_controller(**kwargs)
+    controller.update(0, 1 / 60)
+    assert isinstance(controller._astar_controller.destination_point, Vect2d)
+
+
+def test_target_in_sight_gates_observe():
+    controller, target = make_controller(particle_filter=True)
+    observed = []
+    pf = controller._particle_filter
+    observe = pf.observe
+    pf.observe = lambda *args: (observed.append(args), observe(*args))
+
+    # the block at x = 5-6 m lies between the points
+    assert not controller.target_in_sight()
+    controller.update(0, 1 / 60)
+    assert pf.initialized and observed == []
+    controller.update(1 / 60, 1 / 60)
+    assert observed == []
+
+    target.x, target.y = 8, 8
+    assert controller.target_in_sight()
+    controller.update(2 / 60, 1 / 60)
+    assert len(observed) == 1 and observed[0][0] == (8, 8)
+
+
+def test_particle_mode_reuses_path():
+    controller, target = make_controller(particle_filter=True)
+    searches = []
+    find_path = controller._astar_controller._find_path
+    controller._astar_controller._find_path = lambda *args: (searches.append(args), find_path(*args))[1]
+    for frame in range(30):
+        controller.update(frame / 60, 1 / 60)
+    walkable = controller._astar_controller._grid.is_walkable
+    assert walkable(controller._astar_controller.cord_to_node(tuple(controller._astar_controller.destination_point)))
+    # searched in the first frame and then only when the forecast drifted
+    assert len([args for args in searches if len(args) == 2]) < 10
+
+
+def test_controllers_share_simulator_block_index():
+    config = {
+        "window": {"w_px": 400, "h_px": 400},
+        "canvas": {"w": 10, "h": 10},
+        "objects": {
+            "blocks": [{"x": 5, "y": 3, "w": 1, "h": 4}],
+            "points": [{"name": "p0", "x": 3, "y": 5}, {"name": "p1", "x": 8, "y": 2}],
+        },
+        "controllers": [
+            {"type": "PursuingController", "managed_point": "p1", "destination_point": "p0", "particle_filter": True},
+            {"type": "EscapingController", "managed_point": "p0", "destination_point": {"x": 9, "y": 9},
+             "pursuing_point": "p1"},
+        ],
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulator.from_config(config, headless=True, seed=0)
+    pursuing, escaping = sim._controllers
+    index = sim.get_block_index()
+    assert pursuing._astar_controller._block_index is index
+    assert pursuing._forecasting_controller._block_index is index
+    assert escaping._astar_controller._block_index is index
+    assert escaping._vision_controller._block_index is index
+    assert not pursuing.target_in_sight()
+
+    # built without the simulator: an own index over the given blocks
+    controller, _ = make_controller()
+    assert controller._astar_controller._block_index is not index
+    assert len(controller._astar_controller._block_index) == 2
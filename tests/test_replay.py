@@ -0,0 +1,36 @@
+import contextlib
+import io
+import json
+import os
+
+import pytest
+
+from simulator.simulator import Simulator
+
+MAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "map_test.json")
+
+
+def load_config():
+    with open(MAP, "r") as f:
+        return json.load(f)
+
+
+def test_replay_repeats_run(tmp_path):
+    path = str(tmp_path / "run.json")
+    with contextlib.redirect_stdout(io.StringIO()):
+        recorded = Simulator.from_config(load_config(), headless=True, seed=3).run(max_steps=120, replay_path=path)
+        replayed = Simulator.from_replay(path, headless=True).run()
+    assert recorded.equals(replayed)
+
+
+@pytest.mark.parametrize("modify", [
+    lambda sim: sim.add_block(5, 5),
+    lambda sim: sim.add_point_mass(3, 3),
+    lambda sim: sim.add_to_mouse_controller(sim.get_point_mass_by_name("p0")),
+])
+def test_modified_simulator_does_not_record_replay(tmp_path, modify):
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim = Simulator.from_config(load_config(), headless=True, seed=3)
+        modify(sim)
+        with pytest.raises(ValueError):
+            sim.run(max_steps=10, replay_path=str(tmp_path / "run.json"))
@@ -0,0 +1,60 @@
+import contextlib
+import io
+import json
+import os
+
+import pytest
+
+from simulator.simulator import Simulator
+
+MAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "map_test.json")
+
+
+def make_sim():
+    with open(MAP, "r") as f:
+        config = json.load(f)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Simulator.from_config(config, headless=True, seed=0)
+
+
+def run(sim, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return sim.run(**kwargs)
+
+
+def test_headless_max_steps():
+    sim = make_sim()
+    df = run(sim, max_steps=90)
+    assert sim.get_stop_reason() == "max_steps"
+    assert sim.get_step_count() == 90
+    assert df.index.unique().size == 90
+    # not profiled without the window unless asked
+    assert sim.get_profiler().names() == []
+
+
+def test_headless_max_time():
+    sim = make_sim()
+    run(sim, max_time=1)
+    assert sim.get_stop_reason() == "max_time"
+    # t = 0, 1/60, ..., 1 s
+    assert sim.get_step_count() == 61
+
+
+def test_headless_profile_on_request():
+    sim = make_sim()
+    run(sim, max_steps=30, profile=True)
+    summary = sim.get_profiler().summary()
+    assert {"input", "controllers", "physics", "history", "frame"} <= set(summary)
+    assert "draw" not in summary
+    assert summary["frame"]["count"] == 30
+
+
+def test_headless_stopped_by_collision():
+    sim = make_sim()
+    run(sim, max_steps=2000)
+    assert sim.get_stop_reason() == ("collision", "p0", "p0_dest")
+    assert 0 < sim.get_step_count() < 2000
+
+    # a run without a limit is not allowed without the window
+    with pytest.raises(ValueError):
+        sim.run()
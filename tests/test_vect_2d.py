@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.simulator.utils.vect_2d import Vect2d, Vect2dArray
+
+
+def test_slots():
+    v = Vect2d(1, 2)
+    assert not hasattr(v, "__dict__")
+    with pytest.raises(AttributeError):
+        v.z = 3
+
+
+@pytest.mark.parametrize("op, other, expected", [
+    ("__iadd__", Vect2d(1, 2), (4, 6)),
+    ("__iadd__", 1, (4, 5)),
+    ("__isub__", Vect2d(1, 2), (2, 2)),
+    ("__isub__", 0.5, (2.5, 3.5)),
+    ("__imul__", Vect2d(2, 3), (6, 12)),
+    ("__imul__", 2, (6, 8)),
+    ("__itruediv__", 2, (1.5, 2)),
+])
+def test_in_place_operators_modify_and_return_self(op, other, expected):
+    v = Vect2d(3, 4)
+    alias = v
+    result = getattr(v, op)(other)
+    assert result is v
+    assert (alias.x, alias.y) == expected
+
+
+def test_augmented_assignment_keeps_the_object():
+    v = Vect2d(3, 4)
+    ref = v
+    v += Vect2d(1, 1)
+    v *= 2
+    assert v is ref and (ref.x, ref.y) == (8, 10)
+    with pytest.raises(ZeroDivisionError):
+        v /= 0
+
+
+def test_operators_return_new_vectors():
+    v = Vect2d(3, 4)
+    for result in (v + 1, v - Vect2d(1, 1), v * 2, 2 * v, v / 2):
+        assert result is not v
+    assert (v.x, v.y) == (3, 4)
+
+
+def test_norm():
+    assert Vect2d(3, 4).norm() == 5
+    assert Vect2d(1e-200, 1e-200).norm() == math.hypot(1e-200, 1e-200) > 0
+    assert Vect2d(0, 0).distance(Vect2d(-6, 8)) == 10
+
+
+def test_array_matches_vectors():
+    rng = np.random.default_rng(0)
+    vects = [Vect2d(*map(float, rng.normal(size=2))) for _ in range(5)]
+    other = Vect2d(0.5, -2.0)
+    scale = rng.uniform(1, 2, 5)
+    arr = Vect2dArray.from_vects(vects)
+
+    for got, v, s in zip((arr + other) * 3 - arr / 2, vects, scale):
+        expected = (v + other) * 3 - v / 2
+        assert (got.x, got.y) == (expected.x, expected.y)
+    np.testing.assert_array_equal((arr * scale).x, [v.x * s for v, s in zip(vects, scale)])
+    np.testing.assert_array_equal(arr.norm(), [v.norm() for v in vects])
+    np.testing.assert_array_equal(arr.distance(other), [v.distance(other) for v in vects])
+
+
+def test_array_in_place_operators():
+    arr = Vect2dArray([(1, 2), (3, 4)])
+    xy = arr.xy
+    ref = arr
+    arr += Vect2d(1, 1)
+    arr *= np.array([[1, 0], [0, 1]], dtype=bool)
+    arr /= 2
+    assert arr is ref and arr.xy is xy
+    np.testing.assert_array_equal(arr.xy, [(1, 0), (0, 2.5)])
+    copy = arr.copy()
+    copy -= 1
+    np.testing.assert_array_equal(arr.xy, [(1, 0), (0, 2.5)])
+    with pytest.raises(RuntimeError):
+        arr + "x"
+
+
+def test_compare():
+    assert [Vect2d.compare_values(a, 0) for a in (-0.5, 0, 0.0, 3)] == [-1, 0, 0, 1]
+    assert Vect2d(1, -2).compare(Vect2d(0, -2)) == (1, 0)
+    assert Vect2d(1, -2).compare(1) == (0, -1)
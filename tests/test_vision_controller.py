@@ -0,0 +1,78 @@
+import contextlib
+import heapq
+import io
+
+import numpy as np
+import pytest
+
+from simulator.controllers.escaping_controller import EscapingController
+from simulator.controllers.movement_controllers.vision_controller import VisionController
+from simulator.simulator import Simulator
+from src.simulator.utils import helpers as hlp
+from src.simulator.utils.vect_2d import Vect2d
+from src.simulator.utils.vision_node import VisionNode
+
+
+def make_sim():
+    config = {
+        "window": {"w_px": 800, "h_px": 400},
+        "canvas": {"w": 16, "h": 8},
+        "objects": {
+            "blocks": [{"x": 5, "y": 0, "h": 5}, {"x": 10, "y": 3, "h": 5}, {"x": 7, "y": 6, "w": 2}],
+            "points": [{"name": "p0", "x": 2, "y": 2}, {"name": "p1", "x": 14, "y": 1}],
+        },
+        "controllers": [],
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Simulator.from_config(config, headless=True, seed=0)
+
+
+def priority_queue_target(controller):
+    # target choice as before the knowledge masks: every target node pushed to a priority queue
+    # of VisionNodes (ordered by distance * score), the target is its first element
+    pt = controller._managed_point
+    destination = (controller._destination_point.x, controller._destination_point.y)
+    queue = []
+    for node in zip(*np.nonzero(controller._target_mask)):
+        node = (int(node[0]), int(node[1]))
+        dist = hlp.calc_euclidean_dist(node, (pt.x, pt.y))
+        if node == destination and controller._visited_mask[node]:
+            heapq.heappush(queue, VisionNode(node, dist, controller._goal_score))
+        else:
+            heapq.heappush(queue, VisionNode(node, dist, controller._unknown_score))
+    return queue[0] if queue else None
+
+
+@pytest.mark.parametrize("destination", [Vect2d(14, 6), Vect2d(3, 7)])
+def test_target_choice_matches_priority_queue(destination):
+    sim = make_sim()
+    pt = sim.get_point_mass_by_name("p0")
+    controller = VisionController(pt, destination, sim.get_canvas_dim(), sim.get_blocks())
+    checked = 0
+    for _ in range(40):
+        controller._clear_target_nodes()
+        controller._update_view()
+        controller._target_update()
+        expected = priority_queue_target(controller)
+        if expected is None:
+            assert controller._target is None
+            break
+        assert controller._target.position == expected.position
+        assert controller._target.heuristic_cost == expected.heuristic_cost
+        checked += 1
+        # move the point towards the target, as the controller would
+        pt.x, pt.y = (np.array([pt.x, pt.y]) + np.array(expected.position)) / 2
+    assert checked > 0
+
+
+def test_priority_queue_size_is_deprecated():
+    sim = make_sim()
+    p0, p1 = sim.get_point_mass_by_name("p0"), sim.get_point_mass_by_name("p1")
+    args = (sim.get_canvas_dim(), sim.get_blocks())
+    with pytest.warns(DeprecationWarning):
+        VisionController(p0, Vect2d(14, 6), *args, priority_queue_size=100)
+    with pytest.warns(DeprecationWarning):
+        EscapingController(p0, Vect2d(14, 6), p1, *args, priority_queue_size=100)
+    # positionally, as before
+    with pytest.warns(DeprecationWarning):
+        VisionController(p0, Vect2d(14, 6), *args, 1 / 2, 1, 4, 1, 1000, 100, 1000, 4, 1000)